@@ -0,0 +1,168 @@
+# Author: Ryan Bharat
+# Description: Binary game archive read through mmap. Every move is a fixed width little-endian uint16,
+# source * 90 + destination (a pass is stored as 0, source and destination both a1), and an index of per-game byte
+# offsets lets a reader jump straight to game N without reading the games before it.
+# Usage: python JanggiArchive.py RECORDS ARCHIVE [--encoding cp949]   (convert a GIB or text record file)
+#        python JanggiArchive.py ARCHIVE --game N                      (print one game of an archive)
+#
+# Layout: header (magic, version, game count, index offset), then the moves of every game back to back, then the
+# index: game count + 1 uint64 byte offsets (game N is the moves between offsets N and N + 1) followed by one result
+# byte per game (its position in GAME_STATES, or 255 when the record gives no result).
+
+import argparse
+import mmap
+import struct
+import sys
+import time
+from array import array
+
+from JanggiGame import LOCATION_COORDINATES, GAME_STATES, square_name
+from JanggiRecords import GameRecord, check_setup, read_game_file
+
+MAGIC = b'JGAR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')  # Magic, version, unused, game count, index offset
+OFFSET = struct.Struct('<QQ')  # The offsets either side of one game's moves
+NO_RESULT = 255
+PASS_CODE = 0
+# Location pairs of every uint16 code, None where source and destination are the same square (a pass)
+CODE_MOVES = [None if source == destination else (square_name(source), square_name(destination))
+              for source in range(90) for destination in range(90)]
+
+
+def encode_record_move(move):
+    """ Converts a (source, destination) location pair, or None for a pass, to its archived uint16 """
+    if move is None:
+        return PASS_CODE
+    source_row, source_column = LOCATION_COORDINATES[move[0]]
+    destination_row, destination_column = LOCATION_COORDINATES[move[1]]
+    return (source_row * 9 + source_column) * 90 + destination_row * 9 + destination_column
+
+
+def decode_record_move(code):
+    """ Converts an archived uint16 back to a (source, destination) location pair, or None for a pass """
+    return CODE_MOVES[code]
+
+
+def write_archive(path, records):
+    """ Writes records, from any iterable such as read_game_file, to an archive and returns the number written. Moves
+    are streamed to the file as they arrive, so only the index (9 bytes a game) is held in memory. Raises ValueError
+    for a record that starts from a FEN position or another GIB setup, as archived games all start from the start
+    position. The magic is only written once the index is, so an archive left unfinished by an error is never read
+    as one """
+    offsets = array('Q')
+    results = bytearray()
+    with open(path, 'wb') as archive:
+        archive.write(HEADER.pack(bytes(len(MAGIC)), VERSION, 0, 0, 0))  # Not an archive until the index is written
+        offsets.append(HEADER.size)
+        for record in records:
+            if 'FEN' in record.get_tags():
+                raise ValueError('archived games must start from the start position')
+            check_setup(record.get_tags())
+            moves = array('H', [encode_record_move(move) for move in record.get_moves()])
+            if sys.byteorder == 'big':
+                moves.byteswap()
+            archive.write(moves.tobytes())
+            offsets.append(offsets[-1] + len(moves) * 2)
+            result = record.get_result()
+            results.append(GAME_STATES.index(result) if result in GAME_STATES else NO_RESULT)
+        index_offset = offsets[-1]
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        archive.write(offsets.tobytes())
+        archive.write(results)
+        archive.seek(0)
+        archive.write(HEADER.pack(MAGIC, VERSION, 0, len(results), index_offset))
+    return len(results)
+
+
+class GameArchive:
+    """ Read only view of an archive file through mmap. Opening reads only the header, and reading a game reads only
+    its two index entries and its own moves, so both take the same time whatever the archive's size """
+
+    def __init__(self, path):
+        """ Maps an archive file, raising ValueError if it is not an archive """
+        with open(path, 'rb') as archive:
+            self._map = mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError('not a game archive')
+        magic, version, unused, self._count, self._index_offset = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or self._index_offset + self._count * 9 + 8 > len(self._map):
+            self._map.close()
+            raise ValueError('not a game archive')
+        self._results_offset = self._index_offset + (self._count + 1) * 8
+
+    def __len__(self):
+        """ Returns the number of games """
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """ Unmaps the file """
+        self._map.close()
+
+    def get_game_count(self):
+        """ Getter for the number of games """
+        return self._count
+
+    def get_move_codes(self, number):
+        """ Returns game number's moves as an array of archived uint16 codes. Raises IndexError for a game not in the
+        archive """
+        if not 0 <= number < self._count:
+            raise IndexError('game %d not in archive' % number)
+        start, end = OFFSET.unpack_from(self._map, self._index_offset + number * 8)
+        moves = array('H', self._map[start:end])
+        if sys.byteorder == 'big':
+            moves.byteswap()
+        return moves
+
+    def get_moves(self, number):
+        """ Returns game number's moves as (source, destination) location pairs, None for a pass """
+        return [CODE_MOVES[code] for code in self.get_move_codes(number)]
+
+    def get_result(self, number):
+        """ Returns game number's result as a game state, or None if its record gave none """
+        if not 0 <= number < self._count:
+            raise IndexError('game %d not in archive' % number)
+        result = self._map[self._results_offset + number]
+        return GAME_STATES[result] if result < len(GAME_STATES) else None
+
+    def get_record(self, number):
+        """ Returns game number as a GameRecord """
+        result = self.get_result(number)
+        return GameRecord({'Result': result} if result is not None else {}, self.get_moves(number))
+
+    def replay(self, number):
+        """ Plays game number from the start position and returns the game. Raises ValueError on an invalid move """
+        return self.get_record(number).replay()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert game records to an archive, or print a game from one')
+    parser.add_argument('paths', nargs='+', help='RECORDS ARCHIVE to convert, or ARCHIVE with --game')
+    parser.add_argument('--encoding', default='utf-8', help='encoding of the record file, often cp949 for GIB')
+    parser.add_argument('--game', type=int, help='print this game of the archive')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.game is None:
+        if len(args.paths) != 2:
+            parser.error('converting needs RECORDS and ARCHIVE')
+        count = write_archive(args.paths[1], read_game_file(args.paths[0], args.encoding))
+        print('games: %d  time: %.2fs' % (count, time.perf_counter() - start))
+        return
+    with GameArchive(args.paths[0]) as archive:
+        moves = archive.get_moves(args.game)
+        elapsed = time.perf_counter() - start
+        print(' '.join('pass' if move is None else move[0] + move[1] for move in moves))
+        print('result: %s  games: %d  open and read: %.1fus' % (archive.get_result(args.game), len(archive),
+                                                                elapsed * 1e6))
+
+
+if __name__ == "__main__":
+    main()
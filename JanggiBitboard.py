@@ -0,0 +1,386 @@
+# Author: Ryan Bharat
+# Description: Bitboard engine core for Janggi. The board is held as 90-bit integers, one per piece type and player,
+# with the same public interface as JanggiGame (make_move, get_game_state, is_in_check).
+# Square index is row * 9 + column, so bit 0 is a1 (top left) and bit 89 is i10 (bottom right).
+
+from JanggiGame import JanggiGame, Move, GENERAL_LINES, RAYS, HORSE_MOVES, ELEPHANT_MOVES, FORTRESS_MOVES, \
+    SOLDIER_MOVES, PIECE_CODES, RED_CODE, LOCATION_COORDINATES, piece_from_code
+
+PIECE_NAMES = ('SO', 'CA', 'GE', 'CH', 'HO', 'EL', 'GU')
+PLAYER_CODES = {'BLUE': 0, 'RED': RED_CODE}
+
+
+def _square(coordinate):
+    """ Takes a (row, column) coordinate and returns its square index """
+    return coordinate[0] * 9 + coordinate[1]
+
+
+def _build_ray_masks():
+    """ Converts RAYS into, for every square, (ray mask, increasing, tails) tuples. increasing is True when the ray
+    runs towards higher square indexes, so the nearest blocker is the lowest set bit, and tails maps each square on
+    the ray to the mask of the squares beyond it """
+    table = []
+    for square in range(90):
+        rays = []
+        for ray in RAYS[square // 9][square % 9]:
+            squares = [_square(coordinate) for coordinate in ray]
+            mask = 0
+            for s in squares:
+                mask |= 1 << s
+            tails = {}
+            for i in range(len(squares)):
+                tail = 0
+                for s in squares[i + 1:]:
+                    tail |= 1 << s
+                tails[squares[i]] = tail
+            rays.append((mask, squares[0] > square, tails))
+        table.append(rays)
+    return table
+
+
+def _build_leap_masks(table):
+    """ Converts a leap table whose entries are (legs..., end row, end column) into, for every square, a list of
+    (leg mask, destination square) pairs """
+    masks = []
+    for square in range(90):
+        leaps = []
+        for entry in table[square // 9][square % 9]:
+            legs = 0
+            for i in range(0, len(entry) - 2, 2):
+                legs |= 1 << _square(entry[i:i + 2])
+            leaps.append((legs, _square(entry[-2:])))
+        masks.append(leaps)
+    return masks
+
+
+def _build_step_masks(table):
+    """ Converts a step table of (row, column) destinations into a destination mask for every square """
+    masks = []
+    for square in range(90):
+        mask = 0
+        for coordinate in table[square // 9][square % 9]:
+            mask |= 1 << _square(coordinate)
+        masks.append(mask)
+    return masks
+
+
+def _reverse_leaps(leaps):
+    """ Takes per-square (leg mask, destination) leaps and returns, for every destination, (source square, leg mask)
+    pairs that reach it """
+    reverse = [[] for square in range(90)]
+    for square in range(90):
+        for legs, destination in leaps[square]:
+            reverse[destination].append((square, legs))
+    return reverse
+
+
+def _reverse_steps(steps):
+    """ Takes per-square destination masks and returns, for every destination, the mask of sources reaching it """
+    reverse = [0] * 90
+    for square in range(90):
+        for destination in range(90):
+            if steps[square] >> destination & 1:
+                reverse[destination] |= 1 << square
+    return reverse
+
+
+RAY_MASKS = _build_ray_masks()
+HORSE_MASKS = _build_leap_masks(HORSE_MOVES)
+ELEPHANT_MASKS = _build_leap_masks(ELEPHANT_MOVES)
+FORTRESS_MASKS = _build_step_masks(FORTRESS_MOVES)
+SOLDIER_MASKS = {player: _build_step_masks(SOLDIER_MOVES[player]) for player in SOLDIER_MOVES}
+HORSE_ATTACK_MASKS = _reverse_leaps(HORSE_MASKS)
+ELEPHANT_ATTACK_MASKS = _reverse_leaps(ELEPHANT_MASKS)
+SOLDIER_ATTACK_MASKS = {player: _reverse_steps(SOLDIER_MASKS[player]) for player in SOLDIER_MASKS}
+LINE_MASKS = [sum(1 << line_square for line_square in GENERAL_LINES[square]) for square in range(90)]
+
+
+def _first_bit(mask, increasing):
+    """ Returns the square of the blocker nearest the ray origin: the lowest set bit on an increasing ray, otherwise
+    the highest """
+    if increasing:
+        return (mask & -mask).bit_length() - 1
+    return mask.bit_length() - 1
+
+
+class BitboardJanggiGame:
+    """ Janggi board and rules backed by 90-bit integer bitboards. There is one bitboard per piece code (see
+    JanggiGame.PIECE_CODES) plus an occupancy bitboard per player, so move generation and check tests are done with
+    mask operations instead of inspecting Piece objects square by square. A 90 entry mailbox of piece codes is kept
+    alongside to identify captures. Moves are the same packed ints JanggiGame produces. """
+
+    def __init__(self):
+        """ Initializes the bitboards, mailbox, _game_state, _player_turn and _in_check, then sets up the pieces in
+        the same starting position as JanggiGame """
+        self._bitboards = [0] * 16
+        self._occupied = {'BLUE': 0, 'RED': 0}
+        self._mailbox = [0] * 90
+        self._game_state = 'UNFINISHED'
+        self._player_turn = 'BLUE'
+        self._in_check = {'BLUE': False, 'RED': False}
+        self.set_board(JanggiGame().get_janggi_board())
+
+    def set_board(self, board):
+        """ Takes a 10 by 9 board of Piece objects and [] (as returned by JanggiGame.get_janggi_board) and loads it
+        into the bitboards """
+        self._bitboards = [0] * 16
+        self._occupied = {'BLUE': 0, 'RED': 0}
+        self._mailbox = [0] * 90
+        for row in range(10):
+            for column in range(9):
+                tile = board[row][column]
+                if tile != []:
+                    self.put_piece(row * 9 + column, tile.get_code())
+
+    def get_janggi_board(self):
+        """ Returns the position as a 10 by 9 board of Piece objects and [], the layout used by JanggiGame """
+        board = [[[]] * 9 for i in range(10)]
+        for square in range(90):
+            if self._mailbox[square]:
+                board[square // 9][square % 9] = piece_from_code(self._mailbox[square])
+        return board
+
+    def get_bitboard(self, player, name=None):
+        """ Returns the bitboard of a player's pieces of one type, or of all their pieces when name is None """
+        if name is None:
+            return self._occupied[player]
+        return self._bitboards[PIECE_CODES[name] | PLAYER_CODES[player]]
+
+    def get_game_state(self):
+        """ Getter for game state """
+        return self._game_state
+
+    def set_game_state(self, state):
+        """ Setter method for _game_state. Takes a string and sets it as game_state """
+        self._game_state = state
+
+    def get_player_turn(self):
+        """ Getter for _player_turn """
+        return self._player_turn
+
+    def set_player_turn(self, player):
+        """ Setter for _player_turn """
+        self._player_turn = player
+
+    def set_in_check(self, player, value):
+        """ Setter method of _in_check """
+        self._in_check[player] = value
+
+    def get_in_check(self, player):
+        """ Getter method for _in_check """
+        return self._in_check[player]
+
+    def is_in_check(self, player):
+        """ Takes 'red' or 'blue' as a parameter and returns True if that player is in check, but False otherwise """
+        return self._in_check[player.upper()]
+
+    def change_turns(self):
+        """ Changes the player turn """
+        self._player_turn = 'RED' if self._player_turn == 'BLUE' else 'BLUE'
+
+    def convert_location(self, location):
+        """ Converts the location string (e3, a10, etc.) to a square index, or False if it is not on the board """
+        coordinate = LOCATION_COORDINATES.get(location)
+        return _square(coordinate) if coordinate is not None else False
+
+    def put_piece(self, square, code):
+        """ Places the piece with the given piece code on an empty square """
+        bit = 1 << square
+        self._bitboards[code] |= bit
+        self._occupied['RED' if code & RED_CODE else 'BLUE'] |= bit
+        self._mailbox[square] = code
+
+    def remove_piece(self, square):
+        """ Removes the piece on a square and returns its piece code """
+        code = self._mailbox[square]
+        bit = 1 << square
+        self._bitboards[code] ^= bit
+        self._occupied['RED' if code & RED_CODE else 'BLUE'] ^= bit
+        self._mailbox[square] = 0
+        return code
+
+    def get_general_square(self, player):
+        """ Returns the square of a player's General, or None if it is not on the board """
+        general = self._bitboards[PIECE_CODES['GE'] | PLAYER_CODES[player]]
+        return general.bit_length() - 1 if general else None
+
+    def is_square_attacked(self, square, by_player):
+        """ Takes a square index and a player and returns True if any of that player's pieces could move onto it """
+        bitboards = self._bitboards
+        colour = PLAYER_CODES[by_player]
+        occupied = self._occupied['BLUE'] | self._occupied['RED']
+        cannons = bitboards[6] | bitboards[6 | RED_CODE]
+        chariots = bitboards[5 | colour]
+        target_is_cannon = cannons >> square & 1
+        for mask, increasing, tails in RAY_MASKS[square]:
+            blockers = mask & occupied
+            if not blockers:
+                continue
+            first = _first_bit(blockers, increasing)
+            if chariots >> first & 1:
+                return True
+            if cannons >> first & 1 or target_is_cannon:
+                continue
+            blockers = tails[first] & occupied
+            if blockers and bitboards[6 | colour] >> _first_bit(blockers, increasing) & 1:
+                return True
+        if FORTRESS_MASKS[square] & (bitboards[1 | colour] | bitboards[2 | colour]):  # General and Guards
+            return True
+        if SOLDIER_ATTACK_MASKS[by_player][square] & bitboards[7 | colour]:
+            return True
+        horses = bitboards[4 | colour]
+        for source, legs in HORSE_ATTACK_MASKS[square]:
+            if horses >> source & 1 and not legs & occupied:
+                return True
+        elephants = bitboards[3 | colour]
+        for source, legs in ELEPHANT_ATTACK_MASKS[square]:
+            if elephants >> source & 1 and not legs & occupied:
+                return True
+        return False
+
+    def get_all_possible_moves(self):
+        """ Gets all possible moves for the current player, as packed ints, without considering checks """
+        player = self._player_turn
+        enemy = 'RED' if player == 'BLUE' else 'BLUE'
+        colour = PLAYER_CODES[player]
+        own = self._occupied[player]
+        occupied = own | self._occupied[enemy]
+        cannons = self._bitboards[6] | self._bitboards[6 | RED_CODE]
+        mailbox = self._mailbox
+        can_pass = not self._in_check[player]
+        moves = []
+        for name in PIECE_NAMES:
+            code = PIECE_CODES[name] | colour
+            remaining = self._bitboards[code]
+            while remaining:
+                low = remaining & -remaining
+                remaining ^= low
+                source = low.bit_length() - 1
+                base = source | code << 14  # Packed move with no destination yet
+                if can_pass:
+                    moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+                if name == 'CH':
+                    targets = 0
+                    for mask, increasing, tails in RAY_MASKS[source]:
+                        blockers = mask & occupied
+                        if blockers:
+                            targets |= mask & ~tails[_first_bit(blockers, increasing)]
+                        else:
+                            targets |= mask
+                elif name == 'CA':
+                    targets = 0
+                    for mask, increasing, tails in RAY_MASKS[source]:
+                        blockers = mask & occupied
+                        if not blockers:
+                            continue
+                        screen = _first_bit(blockers, increasing)
+                        if cannons >> screen & 1:
+                            continue  # Cannons cannot jump over cannons
+                        beyond = tails[screen]
+                        blockers = beyond & occupied
+                        if not blockers:
+                            targets |= beyond
+                            continue
+                        stop = _first_bit(blockers, increasing)
+                        targets |= beyond & ~tails[stop] & ~(1 << stop)
+                        if not cannons >> stop & 1:
+                            targets |= 1 << stop  # Cannons cannot capture cannons
+                elif name == 'HO':
+                    targets = 0
+                    for legs, destination in HORSE_MASKS[source]:
+                        if not legs & occupied:
+                            targets |= 1 << destination
+                elif name == 'EL':
+                    targets = 0
+                    for legs, destination in ELEPHANT_MASKS[source]:
+                        if not legs & occupied:
+                            targets |= 1 << destination
+                elif name == 'SO':
+                    targets = SOLDIER_MASKS[player][source]
+                else:
+                    targets = FORTRESS_MASKS[source]
+                targets &= ~own
+                while targets:
+                    low = targets & -targets
+                    targets ^= low
+                    destination = low.bit_length() - 1
+                    moves.append(base | destination << 7 | mailbox[destination] << 18)
+        return moves
+
+    def get_all_valid_moves(self):
+        """ Returns the current player's possible moves that do not leave their General attacked. Only General
+        moves, moves touching the lines through the General and every move while in check are played out """
+        player = self._player_turn
+        enemy = 'RED' if player == 'BLUE' else 'BLUE'
+        general = self.get_general_square(player)
+        possible_moves = self.get_all_possible_moves()
+        if general is None:
+            return possible_moves
+        in_check = self.is_square_attacked(general, enemy)
+        lines = LINE_MASKS[general]
+        valid_moves = []
+        for move in possible_moves:
+            source = move & 127
+            destination = move >> 7 & 127
+            if in_check or source == general or (lines >> source | lines >> destination) & 1:
+                if not self.exposes_general(source, destination, general):
+                    valid_moves.append(move)
+            else:
+                valid_moves.append(move)
+        return valid_moves
+
+    def exposes_general(self, source, destination, general):
+        """ Plays out a move, checks whether the mover's General is attacked afterwards and restores the bitboards """
+        enemy = 'RED' if self._player_turn == 'BLUE' else 'BLUE'
+        if source == destination:
+            return self.is_square_attacked(general, enemy)
+        captured = self._mailbox[destination]
+        if captured:
+            self.remove_piece(destination)
+        moved = self.remove_piece(source)
+        self.put_piece(destination, moved)
+        attacked = self.is_square_attacked(destination if source == general else general, enemy)
+        self.remove_piece(destination)
+        self.put_piece(source, moved)
+        if captured:
+            self.put_piece(destination, captured)
+        return attacked
+
+    def check_in_check(self, player):
+        """ After player moves but before the turn is switched, puts the enemy in check if their General is attacked
+        and ends the game if the enemy then has no valid moves """
+        enemy = 'RED' if player == 'BLUE' else 'BLUE'
+        enemy_general = self.get_general_square(enemy)
+        if enemy_general is not None and self.is_square_attacked(enemy_general, player):
+            self._in_check[enemy] = True
+            self.change_turns()
+            if self.get_all_valid_moves() == []:
+                self._game_state = player + '_WON'
+            self.change_turns()
+
+    def make_move(self, source, destination):
+        """ Takes two board string parameters, converts them to board squares, and executes the move if valid """
+        if self._game_state != 'UNFINISHED':
+            return False
+        source = self.convert_location(source)
+        destination = self.convert_location(destination)
+        if source is False or destination is False:
+            return False
+        move = source | destination << 7 | self._mailbox[source] << 14
+        if source != destination:
+            move |= self._mailbox[destination] << 18
+        if move not in self.get_all_valid_moves():
+            return False
+        player = self._player_turn
+        if source != destination:
+            if self._mailbox[destination]:
+                self.remove_piece(destination)
+            self.put_piece(destination, self.remove_piece(source))
+        self._in_check[player] = False  # A valid move always leaves the mover out of check
+        self.check_in_check(player)
+        self.change_turns()
+        return True
+
+    def get_move_objects(self):
+        """ Returns the valid moves as Move objects, for callers written against JanggiGame """
+        return [Move.from_code(move) for move in self.get_all_valid_moves()]
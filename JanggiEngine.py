@@ -0,0 +1,651 @@
+# Author: Ryan Bharat
+# Description: Computer opponent for JanggiGame. A negamax alpha-beta search with iterative deepening that plays
+# on a JanggiGame through legal_moves, play_move and unmake_move, and scores leaves with its evaluate.
+
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+
+from JanggiGame import JanggiGame, move_src, move_dst, move_piece, move_captured, MATERIAL, PIECE_CODES, RED_CODE
+
+MATE_SCORE = 100000  # Score of delivering checkmate, less the number of plies it takes
+MATE_BOUND = MATE_SCORE - 1000  # Scores beyond this are mates and are stored relative to the node in the table
+NODE_CHECK_INTERVAL = 1024  # Nodes between checks of the time budget
+SHARED_NODE_INTERVAL = 64  # Nodes a ParallelSearcher worker claims from the shared node budget at a time
+DEFAULT_HASH_MB = 16
+MAX_PLY = 128  # Deepest ply that keeps killer moves
+DELTA_MARGIN = 200  # Captures that cannot lift the score within this of alpha are skipped in quiescence
+
+# Transposition table bound types
+EXACT = 1
+LOWER_BOUND = 2  # The search failed high, the score is at least this
+UPPER_BOUND = 3  # The search failed low, the score is at most this
+
+# Table entries pack into one 64-bit word: move (bits 0-21), depth (22-29), bound (30-31) and score (32-52) stored
+# with SCORE_OFFSET added so it is never negative. A filled slot always has a bound, so an empty slot is 0.
+SCORE_OFFSET = 1 << 20
+ENTRY_BYTES = 16  # One 64-bit key and one 64-bit data word per slot
+
+PIECE_VALUES = [0] * 16  # MATERIAL indexed by piece code, for scoring captures
+for _name, _code in PIECE_CODES.items():
+    PIECE_VALUES[_code] = PIECE_VALUES[_code | RED_CODE] = MATERIAL[_name]
+del _name, _code
+
+
+class SearchLimits:
+    """ Budget for a search: a maximum depth in plies, a time budget in seconds and a node budget. Any of them may be
+    None; the search stops at whichever is reached first, and searches to depth 4 if none is given. """
+
+    def __init__(self, depth=None, movetime=None, nodes=None):
+        """ Initializes the limits with a depth, movetime (seconds) and nodes budget """
+        self._depth = depth
+        self._movetime = movetime
+        self._nodes = nodes
+
+    def get_depth(self):
+        """ Getter for the maximum depth, 4 if no limit at all was given """
+        if self._depth is None and self._movetime is None and self._nodes is None:
+            return 4
+        return self._depth
+
+    def get_movetime(self):
+        """ Getter for the time budget in seconds """
+        return self._movetime
+
+    def get_nodes(self):
+        """ Getter for the node budget """
+        return self._nodes
+
+
+class SearchResult:
+    """ Outcome of a search: the chosen move and its score from the point of view of the player to move, the
+    principal variation, and statistics about the work done """
+
+    def __init__(self, move, score, pv, depth, nodes, elapsed):
+        """ Initializes a result with the best move, score, principal variation, completed depth, node count and
+        elapsed seconds """
+        self._move = move
+        self._score = score
+        self._pv = pv
+        self._depth = depth
+        self._nodes = nodes
+        self._elapsed = elapsed
+
+    def get_move(self):
+        """ Getter for the best move as a packed int, None if the player has no moves """
+        return self._move
+
+    def get_score(self):
+        """ Getter for the score of the best move """
+        return self._score
+
+    def get_pv(self):
+        """ Getter for the principal variation, a list of packed moves starting with the best move """
+        return self._pv
+
+    def get_depth(self):
+        """ Getter for the deepest fully completed iteration """
+        return self._depth
+
+    def get_nodes(self):
+        """ Getter for the number of nodes searched """
+        return self._nodes
+
+    def get_elapsed(self):
+        """ Getter for the search time in seconds """
+        return self._elapsed
+
+    def get_nps(self):
+        """ Returns the search speed in nodes per second """
+        return int(self._nodes / self._elapsed) if self._elapsed > 0 else 0
+
+
+class BucketTable:
+    """ Fixed-size hash table of 64-bit entries keyed by 64-bit position keys. Keys and entries live in two
+    preallocated arrays of 64-bit words sized from a megabyte budget. Each bucket has two slots: the first keeps the
+    deepest entry of the keys that map to it and the second is always replaced. Subclasses pack their entries, which
+    must never be 0, and say where the depth is kept with entry_depth. """
+
+    def __init__(self, size_mb=DEFAULT_HASH_MB):
+        """ Initializes the largest power of two number of buckets that fits in size_mb megabytes """
+        buckets = 1
+        while buckets * 2 * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._keys = array('Q', [0]) * (buckets * 2)
+        self._data = array('Q', [0]) * (buckets * 2)
+        self._filled = 0
+        self._probes = 0
+        self._hits = 0
+
+    def get_slots(self):
+        """ Getter for the number of entries the table can hold """
+        return len(self._data)
+
+    def get_size_mb(self):
+        """ Returns the memory used by the keys and entries in megabytes """
+        return len(self._data) * ENTRY_BYTES / (1024 * 1024)
+
+    def get_hit_rate(self):
+        """ Returns the fraction of probes that found their key """
+        return self._hits / self._probes if self._probes else 0.0
+
+    def get_occupancy(self):
+        """ Returns the fraction of slots holding an entry """
+        return self._filled / len(self._data)
+
+    def clear(self):
+        """ Empties the table and resets the statistics """
+        self._keys = array('Q', [0]) * len(self._keys)
+        self._data = array('Q', [0]) * len(self._data)
+        self._filled = 0
+        self._probes = 0
+        self._hits = 0
+
+    def entry_depth(self, data):
+        """ Returns the depth packed into an entry """
+        raise NotImplementedError
+
+    def probe_entry(self, key):
+        """ Returns the entry stored for key, or None if it is not in the table """
+        self._probes += 1
+        index = (key & self._mask) << 1
+        for slot in (index, index + 1):
+            if self._keys[slot] == key and self._data[slot]:
+                self._hits += 1
+                return self._data[slot]
+        return None
+
+    def store_entry(self, key, depth, data):
+        """ Stores an entry for key. It replaces the depth-preferred slot if that holds the same key or an entry no
+        deeper than this one, and the always-replace slot otherwise """
+        index = (key & self._mask) << 1
+        entry = self._data[index]
+        if entry and self._keys[index] != key and self.entry_depth(entry) > depth:
+            index += 1
+            entry = self._data[index]
+        if not entry:
+            self._filled += 1
+        self._keys[index] = key
+        self._data[index] = data
+
+
+class TranspositionTable(BucketTable):
+    """ BucketTable of searched positions keyed by Zobrist hash. An entry packs the best move, the search depth, the
+    bound type and the score into one word """
+
+    def entry_depth(self, data):
+        """ Returns the search depth packed into an entry """
+        return data >> 22 & 0xFF
+
+    def probe(self, key):
+        """ Returns (move, depth, bound, score) stored for the position hash key, or None if it is not in the table """
+        data = self.probe_entry(key)
+        if data is None:
+            return None
+        return data & 0x3FFFFF, data >> 22 & 0xFF, data >> 30 & 0x3, (data >> 32) - SCORE_OFFSET
+
+    def store(self, key, move, depth, bound, score):
+        """ Stores a search result for the position hash key """
+        self.store_entry(key, depth, move | depth << 22 | bound << 30 | (score + SCORE_OFFSET) << 32)
+
+
+class MoveOrderer:
+    """ Orders moves for alpha-beta so that likely cut-offs come first: the transposition table move, then captures
+    by most valuable victim and least valuable attacker, then the killer moves of the ply, then quiet moves by their
+    history score and finally a single pass. Moves are handed out lazily so a cut-off skips sorting the rest. """
+
+    def __init__(self):
+        """ Initializes two killer slots per ply and a history score per piece code and destination square """
+        self._killers = [[0, 0] for ply in range(MAX_PLY)]
+        self._history = [0] * (16 * 90)
+
+    def clear(self):
+        """ Forgets the killer moves and history scores """
+        self._killers = [[0, 0] for ply in range(MAX_PLY)]
+        self._history = [0] * (16 * 90)
+
+    def get_killers(self, ply):
+        """ Getter for the killer moves of a ply """
+        return self._killers[ply] if ply < MAX_PLY else [0, 0]
+
+    def get_history(self, move):
+        """ Getter for the history score of a move's piece and destination """
+        return self._history[move_piece(move) * 90 + move_dst(move)]
+
+    def record_cutoff(self, move, depth, ply):
+        """ Remembers a quiet move that caused a beta cut-off as a killer of the ply and raises its history score """
+        if move_captured(move) or move_src(move) == move_dst(move):
+            return
+        if ply < MAX_PLY:
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self._history[move_piece(move) * 90 + move_dst(move)] += depth * depth
+
+    def order(self, moves, hash_move=0, ply=0):
+        """ Yields the moves in search order, starting with hash_move if it is one of them. Passes all lead to the
+        same position so only one is yielded, the hash move itself when it is a pass """
+        if hash_move and hash_move not in moves:
+            hash_move = 0
+        captures = []
+        quiets = []
+        passing = hash_move if hash_move & 127 == hash_move >> 7 & 127 else 0  # 0 when there is no hash move
+        for move in moves:
+            if move == hash_move:
+                continue
+            if move >> 18:
+                captures.append((PIECE_VALUES[move >> 18] * 16 - PIECE_VALUES[move >> 14 & 15] // 100, move))
+            elif move & 127 == move >> 7 & 127:
+                if not passing:
+                    passing = move
+            else:
+                quiets.append(move)
+        if hash_move:
+            yield hash_move
+        while captures:
+            yield select_best(captures)
+        killers = self._killers[ply] if ply < MAX_PLY else ()
+        for killer in killers:
+            if killer and killer != hash_move and killer in quiets:
+                quiets.remove(killer)
+                yield killer
+        history = self._history
+        scored = [(history[(move >> 14 & 15) * 90 + (move >> 7 & 127)], move) for move in quiets]
+        while scored:
+            yield select_best(scored)
+        if passing and passing != hash_move:
+            yield passing
+
+
+class Searcher:
+    """ Negamax alpha-beta searcher with iterative deepening. Positions are explored on the game itself with
+    play_move and unmake_move, so the game is left exactly as it was given once the search returns. Results are kept
+    in a TranspositionTable, which can be shared between searches, and moves are tried in MoveOrderer order. """
+
+    def __init__(self, table=None):
+        """ Initializes the transposition table, move orderer, node counter, stop flag and search budget """
+        self._table = table if table is not None else TranspositionTable()
+        self._orderer = MoveOrderer()
+        self._nodes = 0
+        self._stopped = False
+        self._deadline = None
+        self._node_limit = None
+
+    def get_nodes(self):
+        """ Getter for the number of nodes searched so far """
+        return self._nodes
+
+    def get_table(self):
+        """ Getter for the transposition table """
+        return self._table
+
+    def is_stopped(self):
+        """ Returns True if the last search ran out of budget before finishing """
+        return self._stopped
+
+    def start(self, limits):
+        """ Resets the node counter, stop flag, killer moves and history, and starts the time and node budget of the
+        limits """
+        self._nodes = 0
+        self._stopped = False
+        self._deadline = time.perf_counter() + limits.get_movetime() if limits.get_movetime() is not None else None
+        self._node_limit = limits.get_nodes()
+        self._orderer.clear()
+
+    def search(self, game, limits):
+        """ Runs iterative deepening on the game within the limits and returns a SearchResult for the deepest
+        completed iteration """
+        start = time.perf_counter()
+        self.start(limits)
+        max_depth = limits.get_depth() if limits.get_depth() is not None else 64
+        best_move, best_score, best_pv, completed = None, 0, [], 0
+        if game.get_game_state() != 'UNFINISHED':
+            return SearchResult(None, 0, [], 0, 0, 0.0)
+        for depth in range(1, max_depth + 1):
+            pv = []
+            score = self.negamax(game, depth, -MATE_SCORE - 1, MATE_SCORE + 1, 0, pv)
+            if self._stopped:
+                break
+            best_score, best_pv, completed = score, pv, depth
+            best_move = pv[0] if pv else None
+            if abs(score) >= MATE_SCORE - max_depth:
+                break  # A forced mate has been found, deeper iterations cannot improve it
+        if best_move is None:  # Budget ran out before depth 1 finished, fall back to any legal move
+            best_move = next(self._orderer.order(game.legal_moves()), None)
+            best_pv = [best_move] if best_move is not None else []
+        return SearchResult(best_move, best_score, best_pv, completed, self._nodes, time.perf_counter() - start)
+
+    def search_move(self, game, move, depth, alpha=-MATE_SCORE - 1):
+        """ Plays a root move, searches the reply depth - 1 plies deep and takes the move back. Returns the move's
+        score for the player to move and its principal variation. A score no better than alpha is only known to be at
+        most alpha """
+        pv = []
+        game.play_move(move)
+        score = -self.negamax(game, depth - 1, -MATE_SCORE - 1, -alpha, 1, pv)
+        game.unmake_move()
+        return score, [move] + pv
+
+    def out_of_budget(self):
+        """ Returns True, and stops the search, once the time or node budget is used up """
+        if self._node_limit is not None and self._nodes >= self._node_limit:
+            self._stopped = True
+        elif self._deadline is not None and self._nodes % NODE_CHECK_INTERVAL == 0 \
+                and time.perf_counter() >= self._deadline:
+            self._stopped = True
+        return self._stopped
+
+    def negamax(self, game, depth, alpha, beta, ply, pv):
+        """ Returns the score of the game's position for the player to move, searching depth plies with an alpha-beta
+        window. The best line found is written into pv """
+        self._nodes += 1
+        if self.out_of_budget():
+            return 0
+        if game.get_game_state() != 'UNFINISHED':
+            return -(MATE_SCORE - ply)  # The previous move checkmated the player to move
+        if depth == 0:
+            return self.quiescence(game, alpha, beta, ply)
+        key = game.position_hash()
+        entry = self._table.probe(key)
+        hash_move = 0
+        if entry is not None:
+            hash_move, entry_depth, bound, score = entry
+            score = score_from_table(score, ply)
+            if ply > 0 and entry_depth >= depth and (bound == EXACT or bound == LOWER_BOUND and score >= beta or
+                                                     bound == UPPER_BOUND and score <= alpha):
+                return score
+        moves = game.legal_moves()
+        if not moves:
+            return -(MATE_SCORE - ply)
+        original_alpha = alpha
+        best = 0
+        for move in self._orderer.order(moves, hash_move, ply):
+            child_pv = []
+            game.play_move(move)
+            score = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1, child_pv)
+            game.unmake_move()
+            if self._stopped:
+                return 0
+            if score > alpha:
+                alpha = score
+                best = move
+                pv[:] = [move] + child_pv
+                if alpha >= beta:
+                    self._orderer.record_cutoff(move, depth, ply)
+                    break
+        if alpha >= beta:
+            bound = LOWER_BOUND
+        elif alpha > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self._table.store(key, best, depth, bound, score_to_table(alpha, ply))
+        return alpha
+
+    def quiescence(self, game, alpha, beta, ply):
+        """ Returns the score of a leaf position once the captures are played out, so exchanges are not cut off at
+        the horizon. The player to move may stand pat on the evaluation instead of capturing, captures that cannot
+        raise the score to alpha are pruned, and a player in check searches every evasion """
+        self._nodes += 1
+        if self.out_of_budget():
+            return 0
+        if game.get_game_state() != 'UNFINISHED':
+            return -(MATE_SCORE - ply)
+        in_check = game.is_in_check(game.get_player_turn())
+        if in_check:  # Standing pat is not an option, every way out of check is searched
+            moves = game.legal_moves()
+            if not moves:
+                return -(MATE_SCORE - ply)
+            stand_pat = None
+        else:
+            stand_pat = self.evaluate(game)
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            moves = game.get_capture_moves()
+        for move in self._orderer.order(moves, 0, ply):
+            if not in_check and stand_pat + PIECE_VALUES[move >> 18] + DELTA_MARGIN <= alpha:
+                continue  # Delta pruning: even winning the piece outright cannot reach alpha
+            game.play_move(move)
+            score = -self.quiescence(game, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self._stopped:
+                return 0
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def evaluate(self, game):
+        """ Returns the static evaluation of the position from the point of view of the player to move """
+        return game.evaluate()
+
+
+class SharedBudgetSearcher(Searcher):
+    """ Searcher of a ParallelSearcher worker. Its node budget is the budget of the whole parallel search, kept in a
+    counter shared by all the workers: it claims SHARED_NODE_INTERVAL nodes at a time from the counter, stops when
+    there are none left to claim and gives back what it did not use, so the workers together never search more nodes
+    than the budget """
+
+    def __init__(self, table, shared_nodes):
+        """ Initializes the searcher with a table and a multiprocessing.Value counting the nodes claimed by every
+        worker """
+        Searcher.__init__(self, table)
+        self._shared_nodes = shared_nodes
+        self._shared_limit = None
+        self._claimed = 0  # Nodes of this search claimed from the shared count
+
+    def start(self, limits):
+        """ Starts a search whose node budget is shared with the other workers """
+        Searcher.start(self, SearchLimits(limits.get_depth(), limits.get_movetime()))
+        self._shared_limit = limits.get_nodes()
+        self._claimed = 0
+
+    def claim_nodes(self):
+        """ Claims up to SHARED_NODE_INTERVAL more nodes from the shared budget. Returns False if none are left """
+        with self._shared_nodes.get_lock():
+            grant = min(SHARED_NODE_INTERVAL, self._shared_limit - self._shared_nodes.value)
+            if grant > 0:
+                self._shared_nodes.value += grant
+        if grant <= 0:
+            return False
+        self._claimed += grant
+        return True
+
+    def release_nodes(self):
+        """ Gives the claimed nodes the search did not use back to the shared budget """
+        if self._shared_limit is not None:
+            with self._shared_nodes.get_lock():
+                self._shared_nodes.value -= self._claimed - self._nodes
+            self._claimed = self._nodes
+
+    def out_of_budget(self):
+        """ Returns True, and stops the search, once the time or the shared node budget is used up """
+        if self._shared_limit is not None and self._nodes >= self._claimed and not self.claim_nodes():
+            self._stopped = True
+        return Searcher.out_of_budget(self)
+
+
+class ParallelSearcher:
+    """ Root-splitting search across a pool of worker processes. Every iteration of the iterative deepening searches
+    the previous best move first, then hands each other root move to a worker, which searches it with the first
+    move's score as alpha using its own Searcher and transposition table. The best move of the deepest iteration
+    that every worker finished is returned with the nodes of all workers added up. A node budget covers the nodes of
+    all the workers together; when it runs out part way through an iteration, the root moves already searched still
+    count if the previous best move is among them. Use it as a context manager, or call close, to shut the pool
+    down """
+
+    def __init__(self, workers=None, table_mb=DEFAULT_HASH_MB):
+        """ Initializes a pool of workers (one per CPU by default), each with a table_mb megabyte table, and the node
+        count they share """
+        self._workers = workers if workers is not None else os.cpu_count() or 1
+        self._shared_nodes = multiprocessing.Value('q', 0)
+        self._pool = multiprocessing.Pool(self._workers, initializer=_init_worker,
+                                          initargs=(table_mb, self._shared_nodes))
+
+    def __enter__(self):
+        """ Returns the searcher for use in a with block """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Shuts the pool down at the end of a with block """
+        self.close()
+
+    def get_workers(self):
+        """ Getter for the number of worker processes """
+        return self._workers
+
+    def close(self):
+        """ Stops the worker processes """
+        self._pool.terminate()
+        self._pool.join()
+
+    def search(self, game, limits=None):
+        """ Searches the game's position on the pool within the limits and returns a SearchResult for the deepest
+        iteration completed for every root move """
+        limits = limits if limits is not None else SearchLimits()
+        start = time.perf_counter()
+        deadline = time.time() + limits.get_movetime() if limits.get_movetime() is not None else None
+        max_depth = limits.get_depth() if limits.get_depth() is not None else 64
+        if game.get_game_state() != 'UNFINISHED':
+            return SearchResult(None, 0, [], 0, 0, 0.0)
+        root = list(MoveOrderer().order(game.legal_moves()))
+        if not root:
+            return SearchResult(None, -MATE_SCORE, [], 0, 0, time.perf_counter() - start)
+        best_move, best_score, best_pv, completed, nodes = root[0], 0, [root[0]], 0, 0
+        self._shared_nodes.value = 0
+        position = game.encode()  # Sent to the workers instead of pickling the whole game
+        for depth in range(1, max_depth + 1):
+            if limits.get_nodes() is not None and nodes >= limits.get_nodes():
+                break
+            results = [self._pool.apply(_search_root_move, ((position, 0, root[0], depth, deadline,
+                                                             limits.get_nodes(), -MATE_SCORE - 1),))]
+            if not results[0][5]:  # The rest only need to show whether they beat the first move
+                tasks = [(position, index, root[index], depth, deadline, limits.get_nodes(), -results[0][0])
+                         for index in range(1, len(root))]
+                results.extend(self._pool.imap_unordered(_search_root_move, tasks))
+            results.sort()
+            nodes += sum(result[4] for result in results)
+            if any(result[5] for result in results):  # Out of budget part way through the iteration
+                finished = [result for result in results if not result[5]]
+                if finished and (completed == 0 or any(result[2] == best_move for result in finished)):
+                    best_score, best_pv, best_move = -finished[0][0], finished[0][3], finished[0][2]
+                break
+            root = [result[2] for result in results]  # Best moves first, for the next iteration and the result
+            best_score, best_pv, completed = -results[0][0], results[0][3], depth
+            best_move = root[0]
+            if abs(best_score) >= MATE_SCORE - max_depth:
+                break
+        return SearchResult(best_move, best_score, best_pv, completed, nodes, time.perf_counter() - start)
+
+
+_worker_searcher = None  # Searcher of a ParallelSearcher worker process, kept between tasks with its table
+_worker_game = None  # Game a worker process decodes each task's position into
+
+
+def _init_worker(table_mb, shared_nodes):
+    """ Creates the Searcher, transposition table and game of a worker process """
+    global _worker_searcher, _worker_game
+    _worker_searcher = SharedBudgetSearcher(TranspositionTable(table_mb), shared_nodes)
+    _worker_game = JanggiGame()
+
+
+def _search_root_move(task):
+    """ Searches one root move in a worker process, with a score at or below alpha meaning it is no better than
+    alpha. Returns (-score, root index, move, principal variation, nodes, stopped), so sorted results put the best
+    move first and break ties by the original move order """
+    position, index, move, depth, deadline, node_limit, alpha = task
+    movetime = deadline - time.time() if deadline is not None else None
+    if movetime is not None and movetime <= 0:
+        return -MATE_SCORE, index, move, [move], 0, True  # Out of time before the task started
+    _worker_searcher.start(SearchLimits(depth, movetime, node_limit))
+    if node_limit is not None and not _worker_searcher.claim_nodes():
+        return -MATE_SCORE, index, move, [move], 0, True  # The other workers used up the node budget
+    _worker_game.set_encoded(position)
+    score, pv = _worker_searcher.search_move(_worker_game, move, depth, alpha)
+    _worker_searcher.release_nodes()
+    return -score, index, move, pv, _worker_searcher.get_nodes(), _worker_searcher.is_stopped()
+
+
+def select_best(scored):
+    """ Removes and returns the move with the highest score from a list of (score, move) pairs """
+    best = 0
+    for index in range(1, len(scored)):
+        if scored[index][0] > scored[best][0]:
+            best = index
+    move = scored[best][1]
+    scored[best] = scored[-1]
+    scored.pop()
+    return move
+
+
+def score_to_table(score, ply):
+    """ Converts a mate score from distance to the root to distance to the node at ply, for storing """
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """ Converts a stored mate score back from distance to the node at ply to distance to the root """
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def best_move(game, limits=None, table=None):
+    """ Searches the game's current position and returns a SearchResult with the best move for the player to move,
+    its score, the principal variation and the node count and speed. limits is a SearchLimits, depth 4 if omitted,
+    and table a TranspositionTable to reuse between calls """
+    return Searcher(table).search(game, limits if limits is not None else SearchLimits())
+
+
+def parallel_best_move(game, limits=None, workers=None):
+    """ Like best_move, but splits the root moves over a pool of worker processes """
+    with ParallelSearcher(workers) as searcher:
+        return searcher.search(game, limits)
+
+
+def benchmark_scaling(positions, limits, worker_counts):
+    """ Searches every position with each number of workers and returns a list of (workers, seconds, nodes,
+    speedup over the first worker count) rows """
+    rows = []
+    for workers in worker_counts:
+        with ParallelSearcher(workers) as searcher:
+            start = time.perf_counter()
+            nodes = sum(searcher.search(game, limits).get_nodes() for game in positions)
+            elapsed = time.perf_counter() - start
+        rows.append((workers, elapsed, nodes, rows[0][1] / elapsed if rows else 1.0))
+    return rows
+
+
+BENCHMARK_FENS = [  # Opening, early middlegame and middlegame positions for the scaling benchmark
+    'rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR w - - 0 1',
+    'rb1a1ab1r/4k4/6nc1/p1p1p1p1p/4n4/2P1c4/P2B2P1P/1CCN5/4K4/R2A1ABNR w - - 2 6',
+    'rb1a1ab1r/4k4/4c2c1/p3pp2p/4n2n1/2P6/P2B2P1P/1C1N1RN2/3K5/R2A1AB2 w - - 8 11',
+]
+
+
+def benchmark_positions():
+    """ Returns a JanggiGame for each of the BENCHMARK_FENS """
+    return [JanggiGame.from_fen(fen) for fen in BENCHMARK_FENS]
+
+
+if __name__ == '__main__':
+    # Scaling benchmark: python JanggiEngine.py [depth] [max workers]
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {2 ** power for power in range(1, 6) if 2 ** power < max_workers})
+    print('cpus', os.cpu_count(), 'depth', depth)
+    for workers, elapsed, nodes, speedup in benchmark_scaling(benchmark_positions(), SearchLimits(depth=depth), counts):
+        print('workers %2d  %7.2fs  %9d nodes  %8d nps  speedup %.2fx' % (workers, elapsed, nodes, nodes / elapsed,
+                                                                         speedup))
@@ -2,6 +2,306 @@
 # Description: This program will simulate a Janggi, a Korean version of chess.
 # SO: Soldier, CH: Chariot, HO: Horse, EL: Elephant, CA: Cannon, GU: Guards, GE: General
 
+import random
+
+FORTRESS_COORDINATES = [(7, 3), (7, 4), (7, 5), (8, 3), (8, 4), (8, 5), (9, 3), (9, 4), (9, 5),
+                        (2, 3), (2, 4), (2, 5), (1, 3), (1, 4), (1, 5), (0, 3), (0, 4), (0, 5)]
+
+
+def _in_board(row, column):
+    """ Returns True if row, column is on the 10 by 9 board """
+    return 0 <= row <= 9 and 0 <= column <= 8
+
+
+HORSE_LEAPS = [((-1, 0), (-2, -1)), ((-1, 0), (-2, 1)), ((1, 0), (2, -1)), ((1, 0), (2, 1)),
+               ((0, -1), (-1, -2)), ((0, -1), (1, -2)), ((0, 1), (-1, 2)), ((0, 1), (1, 2))]  # (leg, end) offsets
+ELEPHANT_LEAPS = [((-1, 0), (-2, -1), (-3, -2)), ((-1, 0), (-2, 1), (-3, 2)), ((1, 0), (2, -1), (3, -2)),
+                  ((1, 0), (2, 1), (3, 2)), ((0, -1), (-1, -2), (-2, -3)), ((0, -1), (1, -2), (2, -3)),
+                  ((0, 1), (-1, 2), (-2, 3)), ((0, 1), (1, 2), (2, 3))]  # (first leg, second leg, end) offsets
+
+PIECE_CODES = {'GE': 1, 'GU': 2, 'EL': 3, 'HO': 4, 'CH': 5, 'CA': 6, 'SO': 7}  # 0 is an empty tile
+RED_CODE = 8  # Added to the piece code of RED pieces
+
+# FEN letters as used by Fairy-Stockfish for Janggi: uppercase for BLUE, lowercase for RED. The first rank in a FEN is
+# row 0 (RED's back rank) and the side to move is 'w' for BLUE and 'b' for RED.
+FEN_LETTERS = {'GE': 'k', 'GU': 'a', 'EL': 'b', 'HO': 'n', 'CH': 'r', 'CA': 'c', 'SO': 'p'}
+FEN_CODES = {}  # FEN letter to piece code
+CODE_LETTERS = [''] * 16  # Piece code to FEN letter
+for _name, _letter in FEN_LETTERS.items():
+    FEN_CODES[_letter.upper()] = PIECE_CODES[_name]
+    FEN_CODES[_letter] = PIECE_CODES[_name] | RED_CODE
+    CODE_LETTERS[PIECE_CODES[_name]] = _letter.upper()
+    CODE_LETTERS[PIECE_CODES[_name] | RED_CODE] = _letter
+del _name, _letter
+GAME_STATES = ['UNFINISHED', 'BLUE_WON', 'RED_WON']  # Game state numbers of the binary encoding
+ENCODED_SIZE = 46  # Bytes of an encoded position: 90 square nibbles and a flags byte
+START_FEN = 'rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR w - - 0 1'
+
+# Moves are packed into a single int: source square in bits 0-6, destination square in bits 7-13, moving piece code
+# in bits 14-17 and captured piece code in bits 18-21. Squares are row * 9 + column.
+
+
+def encode_move(source, destination, piece, captured=0):
+    """ Packs source and destination squares and the moving and captured piece codes into a move int """
+    return source | destination << 7 | piece << 14 | captured << 18
+
+
+def decode_move(move):
+    """ Unpacks a move int into (source square, destination square, piece code, captured piece code) """
+    return move & 127, move >> 7 & 127, move >> 14 & 15, move >> 18 & 15
+
+
+def move_src(move):
+    """ Returns the source square of a move int """
+    return move & 127
+
+
+def move_dst(move):
+    """ Returns the destination square of a move int """
+    return move >> 7 & 127
+
+
+def move_piece(move):
+    """ Returns the code of the piece making a move int """
+    return move >> 14 & 15
+
+
+def move_captured(move):
+    """ Returns the code of the piece captured by a move int, 0 if nothing is captured """
+    return move >> 18 & 15
+
+
+def move_coordinates(move):
+    """ Returns the ((row, column), (row, column)) source and destination of a move int """
+    return divmod(move & 127, 9), divmod(move >> 7 & 127, 9)
+
+
+def square_name(square):
+    """ Returns the location string (e3, a10, etc.) of a square index """
+    return 'abcdefghi'[square % 9] + str(square // 9 + 1)
+
+
+def move_name(move):
+    """ Returns a move int as its source and destination location strings, e.g. c7c6 """
+    return square_name(move & 127) + square_name(move >> 7 & 127)
+
+
+LOCATION_COORDINATES = {square_name(square): divmod(square, 9) for square in range(90)}  # e9 -> (8, 4)
+
+
+def _general_lines():
+    """ Builds, for every square index (row * 9 + column), the squares whose occupancy can decide whether a General
+    standing there is attacked: its row and column (Chariot and Cannon lines) and the two nearest squares on each
+    diagonal (fortress diagonals plus the legs of Horses and Elephants) """
+    lines = []
+    for row in range(10):
+        for column in range(9):
+            squares = set()
+            for r in range(10):
+                squares.add(r * 9 + column)
+            for c in range(9):
+                squares.add(row * 9 + c)
+            for r in (-1, 1):
+                for c in (-1, 1):
+                    for d in range(1, 3):
+                        if _in_board(row + r * d, column + c * d):
+                            squares.add((row + r * d) * 9 + column + c * d)
+            squares.discard(row * 9 + column)
+            lines.append(frozenset(squares))
+    return lines
+
+
+GENERAL_LINES = _general_lines()
+
+
+def _build_horse_moves():
+    """ Builds, for every square, the (leg row, leg column, end row, end column) tuples of each Horse leap """
+    table = [[[] for column in range(9)] for row in range(10)]
+    for row in range(10):
+        for column in range(9):
+            for leg, end in HORSE_LEAPS:
+                if _in_board(row + end[0], column + end[1]):
+                    table[row][column].append((row + leg[0], column + leg[1], row + end[0], column + end[1]))
+    return table
+
+
+def _build_elephant_moves():
+    """ Builds, for every square, the (first leg row, first leg column, second leg row, second leg column, end row,
+    end column) tuples of each Elephant leap """
+    table = [[[] for column in range(9)] for row in range(10)]
+    for row in range(10):
+        for column in range(9):
+            for leg, diag, end in ELEPHANT_LEAPS:
+                if _in_board(row + end[0], column + end[1]):
+                    table[row][column].append((row + leg[0], column + leg[1], row + diag[0], column + diag[1],
+                                               row + end[0], column + end[1]))
+    return table
+
+
+def _build_fortress_moves():
+    """ Builds, for every square, the adjacent squares a Guard or General can step to without leaving the fortress """
+    table = [[[] for column in range(9)] for row in range(10)]
+    for row, column in FORTRESS_COORDINATES:
+        for r in (-1, 0, 1):
+            for c in (-1, 0, 1):
+                if (r, c) != (0, 0) and (row + r, column + c) in FORTRESS_COORDINATES:
+                    table[row][column].append((row + r, column + c))
+    return table
+
+
+def _build_soldier_moves():
+    """ Builds, for each player and every square, the squares a Soldier can step to: forward, sideways and forward
+    along the fortress diagonals """
+    tables = {}
+    for player, forward in (('RED', 1), ('BLUE', -1)):
+        table = [[[] for column in range(9)] for row in range(10)]
+        for row in range(10):
+            for column in range(9):
+                for r, c in ((forward, 0), (0, -1), (0, 1)):
+                    if _in_board(row + r, column + c):
+                        table[row][column].append((row + r, column + c))
+                if (row, column) in FORTRESS_COORDINATES:
+                    for c in (-1, 1):
+                        if (row + forward, column + c) in FORTRESS_COORDINATES:
+                            table[row][column].append((row + forward, column + c))
+        tables[player] = table
+    return tables
+
+
+def _reverse_table(table):
+    """ Takes a move table whose entries end with the destination (row, column) and returns, for every destination,
+    the (source row, source column, *legs) tuples that reach it """
+    reverse = [[[] for column in range(9)] for row in range(10)]
+    for row in range(10):
+        for column in range(9):
+            for entry in table[row][column]:
+                reverse[entry[-2]][entry[-1]].append((row, column) + tuple(entry[:-2]))
+    return reverse
+
+
+def _build_rays():
+    """ Builds, for every square, the rays a Chariot or Cannon slides along: the four lines to the board edge plus,
+    inside a fortress, the diagonals as far as they stay in the fortress. Each ray lists its squares nearest first """
+    table = [[[] for column in range(9)] for row in range(10)]
+    for row in range(10):
+        for column in range(9):
+            for r, c in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                ray = []
+                while _in_board(row + r * (len(ray) + 1), column + c * (len(ray) + 1)):
+                    ray.append((row + r * (len(ray) + 1), column + c * (len(ray) + 1)))
+                if ray:
+                    table[row][column].append(ray)
+            if (row, column) in FORTRESS_COORDINATES:
+                for r in (-1, 1):
+                    for c in (-1, 1):
+                        ray = []
+                        while (row + r * (len(ray) + 1), column + c * (len(ray) + 1)) in FORTRESS_COORDINATES:
+                            ray.append((row + r * (len(ray) + 1), column + c * (len(ray) + 1)))
+                        if ray:
+                            table[row][column].append(ray)
+    return table
+
+
+RAYS = _build_rays()
+HORSE_MOVES = _build_horse_moves()
+ELEPHANT_MOVES = _build_elephant_moves()
+FORTRESS_MOVES = _build_fortress_moves()
+SOLDIER_MOVES = _build_soldier_moves()
+HORSE_ATTACKS = _reverse_table(HORSE_MOVES)  # (source row, source column, leg row, leg column)
+ELEPHANT_ATTACKS = _reverse_table(ELEPHANT_MOVES)  # (source row, source column, legs...)
+SOLDIER_ATTACKS = {player: _reverse_table(SOLDIER_MOVES[player]) for player in SOLDIER_MOVES}
+
+
+def _build_zobrist_keys():
+    """ Builds the random 64-bit Zobrist keys: one per piece code and square, one for RED to move and one per player
+    for being in check. The generator is seeded so every process and every run agrees on position hashes """
+    generator = random.Random(0x4A414E4747)
+    pieces = [[generator.getrandbits(64) for square in range(90)] for code in range(16)]
+    turn = generator.getrandbits(64)
+    in_check = {'BLUE': generator.getrandbits(64), 'RED': generator.getrandbits(64)}
+    return pieces, turn, in_check
+
+
+ZOBRIST_PIECES, ZOBRIST_RED_TURN, ZOBRIST_IN_CHECK = _build_zobrist_keys()
+
+
+MATERIAL = {'CH': 1300, 'CA': 700, 'HO': 500, 'EL': 300, 'GU': 300, 'SO': 200, 'GE': 0}  # Hundredths of a point
+
+# Piece-square bonuses seen from BLUE: row 0 is RED's back rank and row 9 is BLUE's. RED uses them mirrored.
+PIECE_SQUARE_TABLES = {
+    'SO': [[0, 0, 0, 10, 15, 10, 0, 0, 0],
+           [10, 10, 15, 25, 30, 25, 15, 10, 10],
+           [10, 15, 20, 30, 35, 30, 20, 15, 10],
+           [10, 15, 20, 25, 25, 25, 20, 15, 10],
+           [5, 10, 15, 20, 20, 20, 15, 10, 5],
+           [0, 5, 5, 10, 10, 10, 5, 5, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0]],
+    'HO': [[-10, 0, 0, 0, 0, 0, 0, 0, -10],
+           [0, 5, 10, 10, 10, 10, 10, 5, 0],
+           [0, 10, 15, 15, 15, 15, 15, 10, 0],
+           [0, 10, 15, 20, 20, 20, 15, 10, 0],
+           [0, 5, 15, 20, 20, 20, 15, 5, 0],
+           [0, 5, 10, 15, 15, 15, 10, 5, 0],
+           [0, 5, 10, 10, 10, 10, 10, 5, 0],
+           [-5, 0, 5, 5, 5, 5, 5, 0, -5],
+           [-5, 0, 0, 0, 0, 0, 0, 0, -5],
+           [-10, -5, 0, 0, -5, 0, 0, -5, -10]],
+    'EL': [[0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 5, 5, 5, 0, 0, 0],
+           [0, 5, 5, 5, 5, 5, 5, 5, 0],
+           [0, 5, 10, 10, 10, 10, 10, 5, 0],
+           [0, 5, 10, 10, 10, 10, 10, 5, 0],
+           [0, 5, 10, 10, 10, 10, 10, 5, 0],
+           [0, 5, 5, 10, 10, 10, 5, 5, 0],
+           [0, 0, 5, 5, 5, 5, 5, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [-5, 0, 0, 0, 0, 0, 0, 0, -5]],
+    'CH': [[10, 10, 10, 15, 15, 15, 10, 10, 10],
+           [15, 15, 15, 20, 25, 20, 15, 15, 15],
+           [10, 10, 10, 15, 15, 15, 10, 10, 10],
+           [5, 5, 5, 10, 10, 10, 5, 5, 5],
+           [5, 5, 5, 10, 10, 10, 5, 5, 5],
+           [5, 5, 5, 10, 10, 10, 5, 5, 5],
+           [0, 0, 0, 5, 5, 5, 0, 0, 0],
+           [0, 0, 0, 5, 5, 5, 0, 0, 0],
+           [-5, 0, 0, 5, 5, 5, 0, 0, -5],
+           [-5, 0, 0, 5, 0, 5, 0, 0, -5]],
+    'CA': [[0, 0, 0, 5, 10, 5, 0, 0, 0],
+           [0, 0, 0, 5, 10, 5, 0, 0, 0],
+           [0, 0, 0, 5, 5, 5, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 0, 0, 0, 0, 0, 0, 0, 0],
+           [0, 5, 0, 5, 10, 5, 0, 5, 0],
+           [0, 0, 0, 5, 15, 5, 0, 0, 0],
+           [0, 0, 0, 5, 10, 5, 0, 0, 0]],
+    'GU': [[0, 0, 0, 0, 0, 0, 0, 0, 0]] * 7 + [[0, 0, 0, 5, 5, 5, 0, 0, 0],
+                                                [0, 0, 0, 5, 10, 5, 0, 0, 0],
+                                                [0, 0, 0, 0, 5, 0, 0, 0, 0]],
+    'GE': [[0, 0, 0, 0, 0, 0, 0, 0, 0]] * 7 + [[0, 0, 0, -10, -5, -10, 0, 0, 0],
+                                                [0, 0, 0, -5, 10, -5, 0, 0, 0],
+                                                [0, 0, 0, 0, 5, 0, 0, 0, 0]],
+}
+
+
+def _build_piece_square_values():
+    """ Builds, for every piece code and square index, the piece's material plus its piece-square bonus: positive
+    for BLUE pieces and negative for RED, so a position's evaluation is the sum over its pieces """
+    values = [[0] * 90 for code in range(16)]
+    for name, code in PIECE_CODES.items():
+        table = PIECE_SQUARE_TABLES[name]
+        for row in range(10):
+            for column in range(9):
+                values[code][row * 9 + column] = MATERIAL[name] + table[row][column]
+                values[code | RED_CODE][row * 9 + column] = -(MATERIAL[name] + table[9 - row][column])
+    return values
+
+
+PIECE_SQUARE_VALUES = _build_piece_square_values()
 
 class JanggiGame:
     """ Class containing representing the game board and the logic. It is the 'brain' of the game. Communicates
@@ -10,16 +310,160 @@ class JanggiGame:
     def __init__(self):
         """ Initializes an 10 row by 9 column board with _game_state, _player_turn, _fortress_coordinates, and _in_check
         , and _call_move as data members. Will then call a method _place_pieces. """
+        self._init_data_members()
+        self.place_pieces()
+
+    def _init_data_members(self):
+        """ Initializes the data members for an empty board with BLUE to move """
         self._janggi_board = [[[]] * 9 for i in range(10)]
+        self._hash = 0  # Zobrist hash of the empty board with BLUE to move, kept up to date by the setters
+        self._evaluation = 0  # Material and piece-square score for BLUE minus RED, kept up to date by the setters
         self._game_state = 'UNFINISHED'
         self._player_turn = 'BLUE'
         self._call_move = {'SO': self.get_soldier_moves, 'CH': self.get_chariot_moves, 'HO': self.get_horse_moves,
                            'EL': self.get_elephant_moves, 'CA': self.get_cannon_moves, 'GU': self.get_guard_moves,
                            'GE': self.get_general_moves}
-        self._fortress_coordinates = [(7, 3), (7, 4), (7, 5), (8, 3), (8, 4), (8, 5), (9, 3), (9, 4), (9, 5),
-                                      (2, 3), (2, 4), (2, 5), (1, 3), (1, 4), (1, 5), (0, 3), (0, 4), (0, 5)]
+        self._fortress_coordinates = list(FORTRESS_COORDINATES)
         self._in_check = {'BLUE': False, 'RED': False}
-        self.place_pieces()
+        self._legal_moves = None  # Memoised valid moves, cleared whenever the board changes
+        self._legal_moves_key = None  # (player turn, in check) the memoised moves were generated for
+        self._legal_move_set = None
+        self._undo_stack = []  # One record per move played: move, flags, game state, hash, evaluation, memoised moves
+        self._halfmove_clock = 0  # FEN move counters of the position the game started from
+        self._fullmove_number = 1
+
+    @classmethod
+    def _new_empty(cls):
+        """ Returns a new game with an empty board. Skips place_pieces, whose setter calls would only be thrown away
+        by the constructors that set up a whole position in one pass """
+        game = cls.__new__(cls)
+        game._init_data_members()
+        return game
+
+    @classmethod
+    def from_fen(cls, fen):
+        """ Returns a new game set up from a FEN string """
+        game = cls._new_empty()
+        game.set_fen(fen)
+        return game
+
+    def set_fen(self, fen):
+        """ Sets the game up from a FEN string (see START_FEN). The board, position hash and evaluation are built in
+        one pass over the rank strings, then the check flags and game state are worked out for the new position and
+        the move history is cleared. Raises ValueError for a malformed FEN """
+        fields = fen.split()
+        ranks = fields[0].split('/') if fields else []
+        if len(ranks) != 10 or len(fields) < 2 or fields[1] not in ('w', 'b'):
+            raise ValueError('invalid FEN: ' + fen)
+        board = []
+        position_hash = 0
+        evaluation = 0
+        for row, rank in enumerate(ranks):
+            tiles = []
+            for letter in rank:
+                if letter.isdigit():
+                    tiles.extend([[]] * int(letter))
+                elif letter in FEN_CODES and len(tiles) < 9:
+                    code = FEN_CODES[letter]
+                    position_hash ^= ZOBRIST_PIECES[code][row * 9 + len(tiles)]
+                    evaluation += PIECE_SQUARE_VALUES[code][row * 9 + len(tiles)]
+                    tiles.append(PIECES[code])
+                else:
+                    raise ValueError('invalid FEN: ' + fen)
+            if len(tiles) != 9:
+                raise ValueError('invalid FEN: ' + fen)
+            board.append(tiles)
+        self._janggi_board = board
+        self._hash = position_hash ^ (ZOBRIST_RED_TURN if fields[1] == 'b' else 0)
+        self._evaluation = evaluation
+        self._player_turn = 'BLUE' if fields[1] == 'w' else 'RED'
+        self._in_check = {'BLUE': False, 'RED': False}
+        self._game_state = 'UNFINISHED'
+        self._legal_moves = None
+        self._undo_stack = []
+        self._halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self._fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        for player, enemy in (('BLUE', 'RED'), ('RED', 'BLUE')):
+            general = self.get_general_location(player)
+            if general is not None and self.is_square_attacked(general, enemy):
+                self.set_in_check(player, True)
+        if self.is_in_check(self._player_turn) and self.legal_moves() == []:
+            self.set_game_state(('RED' if self._player_turn == 'BLUE' else 'BLUE') + '_WON')
+
+    @classmethod
+    def decode(cls, data):
+        """ Returns a new game set up from the bytes of encode """
+        game = cls._new_empty()
+        game.set_encoded(data)
+        return game
+
+    def encode(self):
+        """ Returns the position as ENCODED_SIZE bytes: the piece code of every square two to a byte, high nibble
+        first, in row * 9 + column order, then a flags byte with RED to move in bit 0, BLUE and RED in check in bits 1
+        and 2 and the GAME_STATES number in bits 3-4. The bytes are hashable, so they work as a dict key """
+        codes = [tile.get_code() if tile != [] else 0 for row in self._janggi_board for tile in row]
+        flags = (self._player_turn == 'RED') | self._in_check['BLUE'] << 1 | self._in_check['RED'] << 2 | \
+            GAME_STATES.index(self._game_state) << 3
+        return bytes([high << 4 | low for high, low in zip(codes[0::2], codes[1::2])] + [flags])
+
+    def set_encoded(self, data):
+        """ Sets the game up from the bytes of encode, restoring the board, turn, check flags and game state. The move
+        history is cleared. Raises ValueError if data is not an encoded position """
+        if len(data) != ENCODED_SIZE or data[-1] >> 3 >= len(GAME_STATES):
+            raise ValueError('not an encoded position')
+        board = []
+        position_hash = 0
+        evaluation = 0
+        for row in range(10):
+            tiles = []
+            for column in range(9):
+                square = row * 9 + column
+                code = data[square >> 1] >> 4 if square & 1 == 0 else data[square >> 1] & 15
+                if code:
+                    if PIECES[code] == []:
+                        raise ValueError('not an encoded position')
+                    position_hash ^= ZOBRIST_PIECES[code][square]
+                    evaluation += PIECE_SQUARE_VALUES[code][square]
+                tiles.append(PIECES[code])
+            board.append(tiles)
+        flags = data[-1]
+        self._janggi_board = board
+        self._player_turn = 'RED' if flags & 1 else 'BLUE'
+        self._in_check = {'BLUE': bool(flags & 2), 'RED': bool(flags & 4)}
+        self._game_state = GAME_STATES[flags >> 3]
+        self._hash = position_hash ^ (ZOBRIST_RED_TURN if flags & 1 else 0) ^ \
+            (ZOBRIST_IN_CHECK['BLUE'] if flags & 2 else 0) ^ (ZOBRIST_IN_CHECK['RED'] if flags & 4 else 0)
+        self._evaluation = evaluation
+        self._legal_moves = None
+        self._undo_stack = []
+        self._halfmove_clock = 0
+        self._fullmove_number = 1
+
+    def to_fen(self):
+        """ Returns the position as a FEN string. The halfmove clock counts plies since the last capture and the
+        fullmove number goes up after each RED move """
+        ranks = []
+        for row in self._janggi_board:
+            rank = ''
+            empty = 0
+            for tile in row:
+                if tile == []:
+                    empty += 1
+                else:
+                    if empty:
+                        rank += str(empty)
+                        empty = 0
+                    rank += CODE_LETTERS[tile.get_code()]
+            ranks.append(rank + str(empty) if empty else rank)
+        plies = len(self._undo_stack)
+        halfmove = self._halfmove_clock + plies
+        for played in range(plies):
+            if move_captured(self._undo_stack[plies - 1 - played][0]):
+                halfmove = played
+                break
+        started_red = (self._player_turn == 'RED') == (plies % 2 == 0)
+        fullmove = self._fullmove_number + (plies + started_red) // 2
+        return '/'.join(ranks) + (' w' if self._player_turn == 'BLUE' else ' b') + ' - - %d %d' % (halfmove, fullmove)
 
     def show_janggi_board(self):
         """ Displays a console view of the board board with Red player on the top end and Blue on the bottom """
@@ -40,8 +484,17 @@ class JanggiGame:
         return self._janggi_board
 
     def set_janggi_board(self, row, column, element):
-        """ Setter method for _janggi_board that takes a row, column, and element and substitutes that into the board """
+        """ Setter method for _janggi_board that takes a row, column, and element and substitutes that into the board.
+        Keeps the position hash and evaluation up to date and clears the memoised legal moves """
+        tile = self._janggi_board[row][column]
+        if tile != []:
+            self._hash ^= ZOBRIST_PIECES[tile.get_code()][row * 9 + column]
+            self._evaluation -= PIECE_SQUARE_VALUES[tile.get_code()][row * 9 + column]
+        if element != []:
+            self._hash ^= ZOBRIST_PIECES[element.get_code()][row * 9 + column]
+            self._evaluation += PIECE_SQUARE_VALUES[element.get_code()][row * 9 + column]
         self._janggi_board[row][column] = element
+        self._legal_moves = None
 
     def get_game_state(self):
         """ Getter for game state """
@@ -56,7 +509,9 @@ class JanggiGame:
         return self._player_turn
 
     def set_player_turn(self, player):
-        """ Setter for _player_turn """
+        """ Setter for _player_turn. Keeps the position hash up to date """
+        if player != self._player_turn:
+            self._hash ^= ZOBRIST_RED_TURN
         self._player_turn = player
 
     def get_call_move(self):
@@ -76,13 +531,49 @@ class JanggiGame:
         self._fortress_coordinates = coordinates
 
     def set_in_check(self, player, value):
-        """ Setter method of _in_check """
+        """ Setter method of _in_check. Keeps the position hash up to date """
+        if value != self._in_check[player]:
+            self._hash ^= ZOBRIST_IN_CHECK[player]
         self._in_check[player] = value
 
     def get_in_check(self, player):
         """ Getter method for _in_check """
         return self._in_check[player]
 
+    def position_hash(self):
+        """ Returns the 64-bit Zobrist hash of the position: the pieces on their squares, the player to move and which
+        players are in check. It is updated incrementally as the board changes """
+        return self._hash
+
+    def compute_position_hash(self):
+        """ Computes the Zobrist hash of the position from scratch by walking the board """
+        position_hash = ZOBRIST_RED_TURN if self._player_turn == 'RED' else 0
+        for player in self._in_check:
+            if self._in_check[player]:
+                position_hash ^= ZOBRIST_IN_CHECK[player]
+        for row in range(10):
+            for column in range(9):
+                tile = self._janggi_board[row][column]
+                if tile != []:
+                    position_hash ^= ZOBRIST_PIECES[tile.get_code()][row * 9 + column]
+        return position_hash
+
+    def evaluate(self):
+        """ Returns the static evaluation of the position for the player to move, in hundredths of a point: material
+        (Chariot 13, Cannon 7, Horse 5, Elephant 3, Guard 3, Soldier 2) plus piece-square bonuses. It is updated
+        incrementally as the board changes, so this costs O(1) """
+        return self._evaluation if self._player_turn == 'BLUE' else -self._evaluation
+
+    def compute_evaluation(self):
+        """ Computes the static evaluation for the player to move from scratch by walking the board """
+        evaluation = 0
+        for row in range(10):
+            for column in range(9):
+                tile = self._janggi_board[row][column]
+                if tile != []:
+                    evaluation += PIECE_SQUARE_VALUES[tile.get_code()][row * 9 + column]
+        return evaluation if self._player_turn == 'BLUE' else -evaluation
+
     def get_tile_occupant(self, coordinate):
         """ Takes a list (row,column) and returns the current piece at tile"""
         return self.get_janggi_board()[coordinate[0]][coordinate[1]]
@@ -133,57 +624,133 @@ class JanggiGame:
 
     def check_in_check(self, player):
         """ After Player A makes a move but before the turn is switched, this method will run a check to see
-          if Player B's General's coordinates are within the moveset for Player A. If they are, Player B is put into
-          check """
+          if Player B's General is attacked by Player A. If it is, Player B is put into check, and if Player B has no
+          valid moves left Player A has won """
         enemy = 'RED' if player == 'BLUE' else 'BLUE'
         enemy_general = self.get_general_location(enemy)
-        player_moves = self.get_all_valid_moves()
-        for player_move in player_moves:
-            dst_row = player_move.get_dst_row()
-            dst_col = player_move.get_dst_col()
-            if (dst_row, dst_col) == enemy_general:
-                self.set_in_check(enemy, True)  # If general is in moveset of player, put enemy in check
-                self.change_turns()  # make enemy the player
-                enemy_moves = self.get_all_valid_moves()
-                if enemy_moves == []:  # If enemy has no moves, player has won. This list is still returning moves. Will need to check.
-                    self.set_game_state(player + '_WON')
-                    self.change_turns()  # Return to intial turn
-                    break
-                self.change_turns()  # restore initial turn
+        if enemy_general is not None and self.is_square_attacked(enemy_general, player):
+            self.set_in_check(enemy, True)  # If general is attacked by player, put enemy in check
+            self.change_turns()  # make enemy the player
+            if self.legal_moves() == []:  # If enemy has no moves, player has won. Kept for the enemy's turn
+                self.set_game_state(player + '_WON')
+            self.change_turns()  # restore initial turn
 
     def make_move(self, source, destination):
         """ Takes two board string parameters, converts them to board coordinates, and executes the move """
         if self.get_game_state() == 'UNFINISHED':
-            move = Move(self.convert_location(source), self.convert_location(destination), self.get_janggi_board())
-            player = self.get_player_turn()
-            valid_moves = self.get_all_valid_moves()
-            if move in valid_moves:  # Valid moves will pull valid moves for the current player's turn
-                if move.get_src_row() == move.get_dst_row() and move.get_src_col() == move.get_dst_col():
-                    pass
-                else:
-                    self.set_janggi_board(move.get_dst_row(), move.get_dst_col(),
-                                      move.get_src_object())  # Change board tile at dst to reflect src object
-                    self.set_janggi_board(move.get_src_row(), move.get_src_col(), [])  # Set src tile to empty
-                if self.is_in_check(player) == True:  # Player removes themself from being in check
-                    self.set_in_check(player, False)
-                self.check_in_check(player)  # Checks if the valid move puts the enemy player in check/checkmate
-                self.change_turns()
-                return True
+            source = self.convert_location(source)
+            destination = self.convert_location(destination)
+            if source is False or destination is False:
+                return False
+            move = self.get_move_code(source, destination)
+            if self.has_legal_moves_cached():
+                valid_moves = self._legal_move_set
+            else:
+                valid_moves = self.get_valid_moves_from(source)  # Only the moves of the piece being moved are needed
+            if move in valid_moves:
+                return self.play_move(move)
         return False
 
+    def play_move(self, move):
+        """ Executes a packed move already known to be valid (for example one taken from legal_moves) for the current
+        player, updates check and game state, changes turns and records the move so unmake_move can take it back """
+        player = self.get_player_turn()
+        self._undo_stack.append((move, self._in_check['BLUE'], self._in_check['RED'], self._game_state, self._hash,
+                                 self._evaluation, self._legal_moves, self._legal_moves_key, self._legal_move_set))
+        source, destination = move_coordinates(move)
+        if source != destination:
+            self.set_janggi_board(destination[0], destination[1],
+                                  self.get_tile_occupant(source))  # Change board tile at dst to reflect src
+            self.set_janggi_board(source[0], source[1], [])  # Set src tile to empty
+        if self.is_in_check(player) == True:  # Player removes themself from being in check
+            self.set_in_check(player, False)
+        self.check_in_check(player)  # Checks if the valid move puts the enemy player in check/checkmate
+        self.change_turns()
+        return True
+
+    def unmake_move(self):
+        """ Takes back the last move made with make_move or play_move in constant time, restoring the board, turn,
+        check flags, game state, position hash, evaluation and memoised legal moves. Returns False if there is nothing
+        to undo """
+        if not self._undo_stack:
+            return False
+        move, blue_check, red_check, game_state, position_hash, evaluation, legal_moves, legal_moves_key, \
+            legal_move_set = self._undo_stack.pop()
+        source, destination, piece, captured = decode_move(move)
+        if source != destination:
+            self._janggi_board[source // 9][source % 9] = PIECES[piece]
+            self._janggi_board[destination // 9][destination % 9] = PIECES[captured] if captured else []
+        self._player_turn = 'RED' if self._player_turn == 'BLUE' else 'BLUE'
+        self._in_check['BLUE'] = blue_check
+        self._in_check['RED'] = red_check
+        self._game_state = game_state
+        self._hash = position_hash
+        self._evaluation = evaluation
+        self._legal_moves = legal_moves
+        self._legal_moves_key = legal_moves_key
+        self._legal_move_set = legal_move_set
+        return True
+
+    def get_move_history(self):
+        """ Returns the packed moves played so far that can be taken back with unmake_move, oldest first """
+        return [record[0] for record in self._undo_stack]
+
+    def perft(self, depth):
+        """ Counts the move paths depth plies deep from the current position, playing every legal move (each pass
+        included) and taking it back. Used to validate and time the move generator """
+        if depth == 0:
+            return 1
+        moves = self.legal_moves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self.play_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+    def hashed_perft(self, depth, table):
+        """ Same count as perft, but remembers the count below every position in table, keyed by position hash ^
+        depth, so positions reached by transposition are only walked once. table is any object with probe(key,
+        depth), returning a stored count or None, and store(key, depth, count), such as perft.PerftTable. It can be
+        reused between calls """
+        if depth <= 1:
+            return self.perft(depth)
+        key = self._hash ^ depth
+        nodes = table.probe(key, depth)
+        if nodes is None:
+            nodes = 0
+            for move in self.legal_moves():
+                self.play_move(move)
+                nodes += self.hashed_perft(depth - 1, table)
+                self.unmake_move()
+            table.store(key, depth, nodes)
+        return nodes
+
+    def divide(self, depth, table=None):
+        """ Returns a dict from each legal move of the current position to the perft count depth - 1 plies below it.
+        Counts go through hashed_perft when a table is given """
+        counts = {}
+        for move in self.legal_moves():
+            self.play_move(move)
+            counts[move] = self.perft(depth - 1) if table is None else self.hashed_perft(depth - 1, table)
+            self.unmake_move()
+        return counts
+
+    def get_move_code(self, source, destination):
+        """ Takes (row,column) source and destination coordinates and returns the packed move int for the pieces
+        currently on them """
+        src_tile = self.get_tile_occupant(source)
+        dst_tile = self.get_tile_occupant(destination)
+        piece = src_tile.get_code() if src_tile != [] else 0
+        captured = dst_tile.get_code() if dst_tile != [] and source != destination else 0
+        return encode_move(source[0] * 9 + source[1], destination[0] * 9 + destination[1], piece, captured)
+
     def convert_location(self, location):
-        """ Converts the location string (e3, a0, etc.) to index reference """
-        row_to_index = {'1': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6, '8': 7, '9': 8, '10': 9}
-        column_to_index = {'a': 0, 'b': 1, 'c': 2, 'd': 3, 'e': 4, 'f': 5, 'g': 6, 'h': 7, 'i': 8}
+        """ Converts the location string (e3, a10, etc.) to index reference, or False if it is not on the board """
         # If you take input of 'e9' in column,row you should get (8,4) in row, column format
-        try:
-            column = column_to_index[location[0]]
-            row = row_to_index[location[1::]]
-            return (row, column)
-        except IndexError:
-            return False
-        except KeyError:
-            return False
+        return LOCATION_COORDINATES.get(location, False)
 
     def change_turns(self):
         """ Changes the player turn """
@@ -201,78 +768,224 @@ class JanggiGame:
                 if tile.get_name() == 'GE' and tile.get_player() == player:
                     return coord
 
+    def legal_moves(self):
+        """ Returns the valid moves for the current position and turn as packed ints. The list is memoised until the
+        board changes through set_janggi_board, or the turn or the current player's check state changes, so repeated
+        calls are free. The returned list is shared and must not be modified """
+        if not self.has_legal_moves_cached():
+            self._legal_moves = self.get_all_valid_moves()
+            self._legal_moves_key = (self._player_turn, self._in_check[self._player_turn])
+            self._legal_move_set = frozenset(self._legal_moves)
+        return self._legal_moves
+
+    def has_legal_moves_cached(self):
+        """ Returns True if legal_moves has a memoised list for the current position and turn """
+        return self._legal_moves is not None and \
+            self._legal_moves_key == (self._player_turn, self._in_check[self._player_turn])
+
+    def clear_legal_moves(self):
+        """ Forgets the memoised legal moves, so the next legal_moves call generates them again """
+        self._legal_moves = None
+
     def get_all_valid_moves(self):
-        """ Takes a list of all possible moves and checks to see if it is a valid move. This method handles
-         the checking for the current player making a move that would put their General in check. """
-        valid_moves = []
-        possible_moves = self.get_all_possible_moves()
+        """ Returns all valid moves for the current player as packed ints """
+        return self.filter_valid_moves(self.get_all_possible_moves())
+
+    def get_valid_moves_from(self, source):
+        """ Takes a (row,column) source and returns the valid moves, as packed ints, of the current player's piece
+        there. Only that piece's moves are generated """
+        tile = self.get_tile_occupant(source)
+        if tile == [] or tile.get_player() != self.get_player_turn():
+            return []
+        possible_moves = []
+        self.get_call_move()[tile.get_name()](source[0], source[1], possible_moves)
+        return self.filter_valid_moves(possible_moves)
+
+    def filter_valid_moves(self, possible_moves):
+        """ Takes a list of possible moves for the current player and keeps the ones that do not leave their General
+        in check. The checkers and the lines running through the General are worked out once per position: a move that
+        neither starts nor ends on one of those squares cannot change whether the General is attacked, so only
+        General moves and moves touching those squares are played out and verified. Moves are packed ints """
         player = self.get_player_turn()
-        enemy = 'RED' if player == 'BLUE' else 'BLUE'
+        player_general = self.get_general_location(player)
+        if player_general is None:  # No General on the board, nothing can be exposed
+            return possible_moves
+        general = player_general[0] * 9 + player_general[1]
+        checkers = self.get_checkers(player)
+        sensitive = GENERAL_LINES[general]
+        if checkers:  # Capturing a checker is the only way off the lines to escape
+            sensitive = sensitive.union(row * 9 + column for row, column in checkers)
+        valid_moves = []
         for move in possible_moves:
-            self.set_janggi_board(move.get_dst_row(), move.get_dst_col(),
-                                  move.get_src_object())  # Change board tile at dst to reflect src object
-            self.set_janggi_board(move.get_src_row(), move.get_src_col(), [])  # Set src tile to empty
-            self.change_turns()
-            enemy_moves = self.get_all_possible_moves()
-            player_general = self.get_general_location(player)
-            attacked = False
-            while attacked == False:
-                for enemy_move in enemy_moves:
-                    dst_row = enemy_move.get_dst_row()
-                    dst_col = enemy_move.get_dst_col()
-                    if player_general == (
-                    dst_row, dst_col):  # Check if player's general is in an enemy move's destination coordinate
-                        attacked = True
-                        break
-                break
-            if attacked == False:
-                valid_moves.append(move)  # Append move if it doesn't expose player's general to enemy_move
-            self.set_janggi_board(move.get_src_row(), move.get_src_col(), move.get_src_object())  # Restore board state
-            self.set_janggi_board(move.get_dst_row(), move.get_dst_col(), move.get_dst_object())
-            self.change_turns()  # Restore turn
+            source = move & 127
+            if source == general or source in sensitive or move >> 7 & 127 in sensitive:
+                if not self.exposes_general(move, player_general):
+                    valid_moves.append(move)
+            elif not checkers:  # Move is off every line to the General, so it cannot expose or cover it
+                valid_moves.append(move)
         return valid_moves
 
+    def get_checkers(self, player):
+        """ Takes a player and returns the coordinates of every enemy piece currently attacking their General """
+        player_general = self.get_general_location(player)
+        if player_general is None:
+            return []
+        enemy = 'RED' if player == 'BLUE' else 'BLUE'
+        return self.get_attackers(player_general, enemy)
+
+    def get_attackers(self, coordinate, player):
+        """ Takes a (row,column) coordinate and a player and returns the coordinates of that player's pieces that
+        have a possible move onto the coordinate """
+        return list(self.find_attackers(coordinate, player))
+
+    def is_square_attacked(self, square, by_player):
+        """ Takes a (row,column) square and a player and returns True if any of that player's pieces could move onto
+        the square. Stops at the first attacker found """
+        for attacker in self.find_attackers(square, by_player):
+            return True
+        return False
+
+    def find_attackers(self, square, player):
+        """ Generator that walks outward from a (row,column) square and yields the coordinates of the player's pieces
+        attacking it: Chariots and Cannons along the lines and fortress diagonals, Horses and Elephants from the
+        squares that leap onto it with clear legs, and Soldiers, Guards and the General from adjacent squares """
+        board = self.get_janggi_board()
+        row, column = square
+        target = board[row][column]
+        target_is_cannon = target != [] and target.get_name() == 'CA'
+        for ray in RAYS[row][column]:  # Chariots and Cannons along the lines and fortress diagonals
+            screened = False
+            for src_row, src_col in ray:
+                tile = board[src_row][src_col]
+                if tile == []:
+                    continue
+                if not screened:
+                    if tile.get_player() == player and tile.get_name() == 'CH':
+                        yield (src_row, src_col)
+                    if tile.get_name() == 'CA':
+                        break  # Cannons cannot jump over cannons
+                    screened = True
+                else:
+                    if tile.get_player() == player and tile.get_name() == 'CA' and not target_is_cannon:
+                        yield (src_row, src_col)
+                    break
+        for src_row, src_col in FORTRESS_MOVES[row][column]:  # Guards and General
+            tile = board[src_row][src_col]
+            if tile != [] and tile.get_player() == player and tile.get_name() in ('GU', 'GE'):
+                yield (src_row, src_col)
+        for src_row, src_col, leg_row, leg_col in HORSE_ATTACKS[row][column]:  # Horses with a clear leg
+            tile = board[src_row][src_col]
+            if tile != [] and tile.get_player() == player and tile.get_name() == 'HO' and board[leg_row][leg_col] == []:
+                yield (src_row, src_col)
+        for src_row, src_col, leg_row, leg_col, diag_row, diag_col in ELEPHANT_ATTACKS[row][column]:
+            tile = board[src_row][src_col]
+            if tile != [] and tile.get_player() == player and tile.get_name() == 'EL' \
+                    and board[leg_row][leg_col] == [] and board[diag_row][diag_col] == []:
+                yield (src_row, src_col)  # Elephants with both legs clear
+        for src_row, src_col in SOLDIER_ATTACKS[player][row][column]:
+            tile = board[src_row][src_col]
+            if tile != [] and tile.get_player() == player and tile.get_name() == 'SO':
+                yield (src_row, src_col)
+
+    def exposes_general(self, move, player_general):
+        """ Plays out a packed move for the current player, checks whether their General (at player_general before
+        the move) is attacked afterwards and restores the board """
+        enemy = 'RED' if self.get_player_turn() == 'BLUE' else 'BLUE'
+        source, destination = move_coordinates(move)
+        if source == destination:  # A pass leaves the board as it is
+            return self.is_square_attacked(player_general, enemy)
+        if source == player_general:
+            player_general = destination
+        board = self.get_janggi_board()
+        src_tile = board[source[0]][source[1]]
+        dst_tile = board[destination[0]][destination[1]]
+        board[destination[0]][destination[1]] = src_tile
+        board[source[0]][source[1]] = []
+        attacked = self.is_square_attacked(player_general, enemy)
+        board[source[0]][source[1]] = src_tile  # Restore board state
+        board[destination[0]][destination[1]] = dst_tile
+        return attacked
+
     def get_all_possible_moves(self):
-        """ Gets all possible moves without considering checks """
+        """ Gets all possible moves, as packed ints, without considering checks """
         moves = []
-        for row in range(len(self.get_janggi_board())):
-            for column in range(len(self.get_janggi_board()[row])):
-                tile = self.get_janggi_board()[row][column]
-                if isinstance(tile, Piece) and tile.get_player() == self.get_player_turn():
-                    self.get_call_move()[tile.get_name()](row, column, moves)  # Calls the appropriate method based on class of Tile
+        board = self.get_janggi_board()
+        turn = self.get_player_turn()
+        call_move = self.get_call_move()
+        for row in range(10):
+            for column in range(9):
+                tile = board[row][column]
+                if tile != [] and tile.get_player() == turn:
+                    call_move[tile.get_name()](row, column, moves)  # Calls the appropriate method based on class of Tile
         return moves
 
+    def get_capture_moves(self):
+        """ Returns the valid capturing moves for the current player as packed ints. Each piece only looks at the
+        squares it could capture on, so no quiet moves or passes are generated """
+        moves = []
+        board = self.get_janggi_board()
+        turn = self.get_player_turn()
+        for row in range(10):
+            for column in range(9):
+                piece = board[row][column]
+                if piece == [] or piece.get_player() != turn:
+                    continue
+                name = piece.get_name()
+                base = row * 9 + column | piece.get_code() << 14  # Packed move with no destination yet
+                targets = []
+                if name == 'CH':
+                    for ray in RAYS[row][column]:  # First piece along each line
+                        for dst_row, dst_col in ray:
+                            if board[dst_row][dst_col] != []:
+                                targets.append((dst_row, dst_col))
+                                break
+                elif name == 'CA':
+                    for ray in RAYS[row][column]:  # First piece past a screen that is not a cannon
+                        screened = False
+                        for dst_row, dst_col in ray:
+                            tile = board[dst_row][dst_col]
+                            if tile == []:
+                                continue
+                            if screened:
+                                if tile.get_name() != 'CA':
+                                    targets.append((dst_row, dst_col))
+                                break
+                            if tile.get_name() == 'CA':
+                                break
+                            screened = True
+                elif name == 'HO':
+                    for leg_row, leg_col, end_row, end_col in HORSE_MOVES[row][column]:
+                        if board[end_row][end_col] != [] and board[leg_row][leg_col] == []:
+                            targets.append((end_row, end_col))
+                elif name == 'EL':
+                    for leg_row, leg_col, diag_row, diag_col, end_row, end_col in ELEPHANT_MOVES[row][column]:
+                        if board[end_row][end_col] != [] and board[leg_row][leg_col] == [] \
+                                and board[diag_row][diag_col] == []:
+                            targets.append((end_row, end_col))
+                elif name == 'SO':
+                    targets = SOLDIER_MOVES[turn][row][column]
+                else:  # Guards and the General
+                    targets = FORTRESS_MOVES[row][column]
+                for dst_row, dst_col in targets:
+                    tile = board[dst_row][dst_col]
+                    if tile != [] and tile.get_player() != turn:
+                        moves.append(base | (dst_row * 9 + dst_col) << 7 | tile.get_code() << 18)
+        return self.filter_valid_moves(moves)
+
     def get_soldier_moves(self, row, column, moves):
         """ Get all soldier moves for the soldier at a specified row,column and add to list of moves"""
         turn = self.get_player_turn()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
         board = self.get_janggi_board()
-        possible_directions = {'RED': [(1, 0), (0, -1), (0, 1)], 'BLUE': [(-1, 0), (0, -1), (0, 1)]}
+        source = row * 9 + column
+        base = source | board[row][column].get_code() << 14  # Packed move with no destination yet
         if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        if self.check_in_fortress(row, column):
-            offset = (-1, 1)
-            row_offset = {'RED': 1,'BLUE': -1}
-            for r in row_offset:
-                if r == turn:
-                    for c in offset:  # Left or right on board
-                        for d in range(1, 2):  # Possible range to move diagonally for a soldier
-                            target_row = row + row_offset[r] * d
-                            target_col = column + c * d
-                            if self.check_in_fortress(target_row, target_col):
-                                tile = self.get_tile_occupant((target_row, target_col))
-                                if tile == [] or tile.get_player() == enemy:
-                                    moves.append(Move((row, column), (target_row, target_col), board))
-        for k in possible_directions:
-            if k == turn:
-                movements = possible_directions[k]
-                for m in movements:
-                    dst_row = row + m[0]
-                    dst_col = column + m[1]
-                    if self.check_in_board(dst_row, dst_col):
-                        tile = self.get_tile_occupant((dst_row, dst_col))
-                        if tile == [] or tile.get_player() == enemy:
-                            moves.append(Move((row, column), (dst_row, dst_col), board))
+            moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+        for dst_row, dst_col in SOLDIER_MOVES[turn][row][column]:
+            tile = board[dst_row][dst_col]
+            if tile == []:
+                moves.append(base | (dst_row * 9 + dst_col) << 7)
+            elif tile.get_player() != turn:
+                moves.append(base | (dst_row * 9 + dst_col) << 7 | tile.get_code() << 18)
 
     def check_in_fortress(self, row, column):
         """ Takes row and column coordinates and returns True if it is within one of the fortress coordinates """
@@ -285,219 +998,122 @@ class JanggiGame:
     def get_chariot_moves(self, row, column, moves):
         """ Takes position of a chariot piece and returns all possible movements to a list """
         turn = self.get_player_turn()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
         board = self.get_janggi_board()
-        possible_directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        source = row * 9 + column
+        base = source | board[row][column].get_code() << 14  # Packed move with no destination yet
         if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        if self.check_in_fortress(row, column):  # Check if in fortress
-            offset = (-1, 1)
-            for r in offset:  # Up or down board
-                for c in offset:  # Left or right on board
-                    for d in range(1, 3):  # Possible range to move diagonally for a chariot
-                        target_row = row + r * d
-                        target_col = column + c * d
-                        if self.check_in_fortress(target_row, target_col):
-                            tile = self.get_tile_occupant((target_row, target_col))
-                            if tile == []:
-                                moves.append(Move((row, column), (target_row, target_col), board))
-                            elif tile.get_player() == enemy:
-                                moves.append(Move((row, column), (target_row, target_col), board))
-                                break
-                            else:
-                                break
-        for k in possible_directions:  # For row directions then column directions
-            for l in range(1, 10):  # Highest possible index is 9
-                dst_row = row + k[0] * l
-                dst_col = column + k[1] * l
-                if self.check_in_board(dst_row, dst_col):  # Check if the destination is in board
-                    tile = self.get_tile_occupant((dst_row, dst_col))
-                    if tile == []:
-                        moves.append(Move((row, column), (dst_row, dst_col), board))
-                    elif tile.get_player() == enemy:
-                        moves.append(Move((row, column), (dst_row, dst_col), board))
-                        break
-                    else:
-                        break
+            moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+        for ray in RAYS[row][column]:  # Lines to the board edge, then fortress diagonals
+            for dst_row, dst_col in ray:
+                tile = board[dst_row][dst_col]
+                if tile == []:
+                    moves.append(base | (dst_row * 9 + dst_col) << 7)
+                else:
+                    if tile.get_player() != turn:
+                        moves.append(base | (dst_row * 9 + dst_col) << 7 | tile.get_code() << 18)
+                    break
 
     def get_horse_moves(self, row, column, moves):
         """ Takes the position of a horse piece and appends all its possible moves to a list"""
         turn = self.get_player_turn()
         board = self.get_janggi_board()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
-        adjacent = {(-1, 0): [(-2, -1), (-2, 1)], (1, 0): [(2, -1), (2, 1)], (0, -1): [(-1, -2), (1, -2)],
-                    (0, 1): [(-1, 2), (1, 2)]}
+        source = row * 9 + column
+        base = source | board[row][column].get_code() << 14  # Packed move with no destination yet
         if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        for a in adjacent:
-            adj_row = row + a[0]
-            adj_col = column + a[1]
-            if self.check_in_board(adj_row, adj_col) and self.get_tile_occupant(
-                    (adj_row, adj_col)) == []:  # Check if adjacent tile in board and free
-                end_tiles = adjacent[a]
-                for end in end_tiles:
-                    end_row = end[0] + row
-                    end_col = end[1] + column
-                    if self.check_in_board(end_row, end_col):  # Check if end tile is in the board
-                        tile = self.get_tile_occupant((end_row, end_col))
-                        if tile == [] or tile.get_player() == enemy:
-                            moves.append(Move((row, column), (end_row, end_col), board))
+            moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+        for leg_row, leg_col, end_row, end_col in HORSE_MOVES[row][column]:
+            if board[leg_row][leg_col] == []:  # Adjacent tile must be free
+                tile = board[end_row][end_col]
+                if tile == []:
+                    moves.append(base | (end_row * 9 + end_col) << 7)
+                elif tile.get_player() != turn:
+                    moves.append(base | (end_row * 9 + end_col) << 7 | tile.get_code() << 18)
 
     def get_elephant_moves(self, row, column, moves):
         """ Takes the position of an elephant piece and appends all its possible moves to a list"""
         turn = self.get_player_turn()
         board = self.get_janggi_board()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
-        adjacent = {(-1, 0): [{(-2, -1): (-3, -2)}, {(-2, 1): (-3, 2)}], (1, 0): [{(2, -1): (3, -2)}, {(2, 1): (3, 2)}],
-                    (0, -1): [{(-1, -2): (-2, -3)}, {(1, -2): (2, -3)}], (0, 1): [{(-1, 2): (-2, 3)}, {(1, 2): (2, 3)}]}
+        source = row * 9 + column
+        base = source | board[row][column].get_code() << 14  # Packed move with no destination yet
         if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        for a in adjacent:
-            adj_row = row + a[0]
-            adj_col = column + a[1]
-            if self.check_in_board(adj_row, adj_col) and self.get_tile_occupant(
-                    (adj_row, adj_col)) == []:  # Check if adjacent tile in board and free
-                diag = adjacent[a]
-                for d in range(len(diag)):
-                    for i in diag[d]:
-                        diag_row = row + i[0]
-                        diag_col = column + i[1]
-                        if self.check_in_board(diag_row, diag_col) and self.get_tile_occupant(
-                                (diag_row, diag_col)) == []:  # Check if diagonal tile from adjacent is clear for move
-                            end_row = row + diag[d][i][0]
-                            end_col = column + diag[d][i][1]
-                            if self.check_in_board(end_row,
-                                                   end_col):  # Check if end tile is within board confines and not occupied by friendly
-                                if self.get_tile_occupant((end_row, end_col)) == [] or self.get_tile_occupant(
-                                        (end_row, end_col)) == enemy:
-                                    moves.append(Move((row, column), (end_row, end_col), board))
+            moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+        for leg_row, leg_col, diag_row, diag_col, end_row, end_col in ELEPHANT_MOVES[row][column]:
+            if board[leg_row][leg_col] == [] and board[diag_row][diag_col] == []:  # Both legs must be free
+                tile = board[end_row][end_col]
+                if tile == []:
+                    moves.append(base | (end_row * 9 + end_col) << 7)
+                elif tile.get_player() != turn:
+                    moves.append(base | (end_row * 9 + end_col) << 7 | tile.get_code() << 18)
 
     def get_cannon_moves(self, row, column, moves):
-        """ Takes the position of a cannon piece and appends all possible movements to a list """
+        """ Takes the position of a cannon piece and appends all possible movements to a list. A cannon must jump
+        exactly one screen, which cannot be another cannon, and cannot capture a cannon """
         turn = self.get_player_turn()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
         board = self.get_janggi_board()
-        possible_directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        friendly, checked = False, False
+        source = row * 9 + column
+        base = source | board[row][column].get_code() << 14  # Packed move with no destination yet
         if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        if self.check_in_fortress(row, column):  # Check if in fortress
-            offset = (-1, 1)
-            for r in offset:  # Up or down board
-                for c in offset:  # Left or right on board
-                    checked = False
-                    for d in range(1, 3):  # Possible range to move diagonally for a cannon
-                        while friendly == True:  # Block executes when a 'jump' piece is identified
-                            for b in range(d, 3):  # Generates the next diagonal
-                                fort_row = row + r * b
-                                fort_col = column + c * b
-                                if self.check_in_fortress(fort_row, fort_col):  # checks if next diagonal is in fortress
-                                    fort_tile = self.get_tile_occupant((fort_row, fort_col))
-                                    if fort_tile == []:
-                                        moves.append(Move((row, column), (fort_row, fort_tile), board))
-                                    elif fort_tile.get_player() == enemy:
-                                        if fort_tile.get_name() == 'CA':
-                                            break
-                                        else:
-                                            moves.append(Move((row, column), (fort_row, fort_tile), board))
-                                            break
-                                    else:
-                                        break
-                            friendly = False
-                            checked = True
-                        if checked == True:
-                            break
-                        target_row = row + r * d
-                        target_col = column + c * d
-                        if self.check_in_fortress(target_row, target_col):
-                            tile = self.get_tile_occupant((target_row, target_col))
-                            if tile == []:
-                                break  # If no intervening piece, break
-                            elif tile.get_player() == turn and tile.get_name() != 'CA':
-                                friendly = True
-                            else:
-                                break
-        for k in possible_directions:  # For row directions then column directions
-            checked = False
-            for l in range(1, 10):  # Highest possible index is 9
-                while friendly == True:
-                    for j in range(l, 10):  # Pick up where friendly piece was found
-                        target_row = row + k[0] * j
-                        target_col = column + k[1] * j
-                        if self.check_in_board(target_row, target_col):
-                            tile = self.get_tile_occupant((target_row, target_col))
-                            if tile == []:
-                                moves.append(Move((row, column), (target_row, target_col), board))
-                            elif tile.get_player() == enemy:
-                                if tile.get_name() == 'CA':
-                                    break  # Cannot capture enemy cannons
-                                else:
-                                    moves.append(Move((row, column), (target_row, target_col), board))
-                                    break  # Cannot capture past enemy tiles
-                            else:
-                                break  # Encountered another friendly, so stop checking direction
-                    friendly = False
-                    checked = True
-                if checked == True:
-                    break
-                dst_row = row + k[0] * l
-                dst_col = column + k[1] * l
-                if self.check_in_board(dst_row, dst_col):  # Check if the destination is in board
-                    tile = self.get_tile_occupant((dst_row, dst_col))
+            moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+        for ray in RAYS[row][column]:  # Lines to the board edge, then fortress diagonals
+            screened = False
+            for dst_row, dst_col in ray:
+                tile = board[dst_row][dst_col]
+                if not screened:
                     if tile != []:
                         if tile.get_name() == 'CA':
-                            break
-                        else: # Intervening non-cannon piece has been found
-                            friendly = True
-
+                            break  # Cannons cannot jump over cannons
+                        screened = True
+                elif tile == []:
+                    moves.append(base | (dst_row * 9 + dst_col) << 7)
+                else:
+                    if tile.get_player() != turn and tile.get_name() != 'CA':  # Cannons cannot capture cannons
+                        moves.append(base | (dst_row * 9 + dst_col) << 7 | tile.get_code() << 18)
+                    break
 
     def get_guard_moves(self, row, column, moves):
         """ Takes the position of Guard piece and appends all its possible movements to a list """
         turn = self.get_player_turn()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
         board = self.get_janggi_board()
-        possible_directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+        source = row * 9 + column
+        base = source | board[row][column].get_code() << 14  # Packed move with no destination yet
         if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        for p in possible_directions:
-            end_row = row + p[0]
-            end_col = column + p[1]
-            if self.check_in_fortress(end_row, end_col):
-                end_tile = self.get_tile_occupant((end_row, end_col))
-                if end_tile == [] or end_tile.get_player() == enemy:
-                    moves.append(Move((row, column), (end_row, end_col), board))
+            moves.append(base | source << 7)  # Equivalent of a pass. Piece does not move.
+        for end_row, end_col in FORTRESS_MOVES[row][column]:
+            end_tile = board[end_row][end_col]
+            if end_tile == []:
+                moves.append(base | (end_row * 9 + end_col) << 7)
+            elif end_tile.get_player() != turn:
+                moves.append(base | (end_row * 9 + end_col) << 7 | end_tile.get_code() << 18)
 
     def get_general_moves(self, row, column, moves):
         """ Takes the position of a General piece and appends all its possible movements to a list """
-        turn = self.get_player_turn()
-        enemy = 'BLUE' if turn == 'RED' else 'RED'
-        board = self.get_janggi_board()
-        possible_directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        if self.is_in_check(turn) == False:
-            moves.append(Move((row, column), (row, column), board))  # Equivalent of a pass. Piece does not move.
-        for p in possible_directions:
-            end_row = row + p[0]
-            end_col = column + p[1]
-            if self.check_in_fortress(end_row, end_col):
-                end_tile = self.get_tile_occupant((end_row, end_col))
-                if end_tile == [] or end_tile.get_player() == enemy:
-                    moves.append(Move((row, column), (end_row, end_col), board))
+        self.get_guard_moves(row, column, moves)  # General steps inside the fortress exactly like a Guard
 
 
 class Move:
-    """ Contains all data relevant to the player actions at a particular state in the game. The board will interpret data from this class and
-     apply it to its own logic in order to process moves. Move objects are not used or accessed beyond the current player's turn. It communicates
-     with the JanggiGame class to provide choices for the player. """
+    """ Compatibility wrapper around a packed move int, for callers that work with Move objects. Move generation
+    itself produces plain ints (see encode_move); a Move can be built from source and destination coordinates on a
+    board, or from a packed move with from_code. """
+
+    __slots__ = ('_code', '_src_object', '_dst_object')
 
     def __init__(self, source, destination, board):
-        """ Initializes a move object with a source and destination tile, and an instance of JanggiGame """
-        self._src_row = source[0]
-        self._src_col = source[1]
-        self._dst_row = destination[0]
-        self._dst_col = destination[1]
-        self._src_object = board[self._src_row][self._src_col]
-        self._dst_object = board[self._dst_row][self._dst_col]
-        self._move_id = (self._src_row, self._src_col, self._dst_row, self._dst_col)
+        """ Initializes a move object with a source and destination tile, and the board they are on """
+        self._src_object = board[source[0]][source[1]]
+        self._dst_object = board[destination[0]][destination[1]]
+        piece = self._src_object.get_code() if self._src_object != [] else 0
+        captured = self._dst_object.get_code() if self._dst_object != [] and source != destination else 0
+        self._code = encode_move(source[0] * 9 + source[1], destination[0] * 9 + destination[1], piece, captured)
+
+    @classmethod
+    def from_code(cls, code):
+        """ Builds a Move from a packed move int """
+        move = cls.__new__(cls)
+        move._code = code
+        source, destination, piece, captured = decode_move(code)
+        move._src_object = piece_from_code(piece)
+        move._dst_object = move._src_object if source == destination else piece_from_code(captured)
+        return move
 
     def __eq__(self, other):
         """ Overrides the equals method to allow for comparing between Move objects. """
@@ -505,44 +1121,53 @@ class Move:
             return self.get_move_id() == other.get_move_id()
         return False
 
+    def __hash__(self):
+        """ Hashes a move by its move_id, consistent with __eq__, so Move objects can be kept in sets and dicts """
+        return hash(self.get_move_id())
+
+    def get_code(self):
+        """ Getter for the packed move int """
+        return self._code
+
     def get_move_id(self):
-        """ Getter for the _move_id data member """
-        return self._move_id
+        """ Returns the (src_row, src_col, dst_row, dst_col) tuple identifying the move """
+        source, destination = move_coordinates(self._code)
+        return source + destination
 
     def set_move_id(self):
         """ Setter for the _move_id data member """
 
     def get_src_row(self):
-        """ Getter for _src_row data member """
-        return self._src_row
+        """ Getter for the source row """
+        return (self._code & 127) // 9
 
     def set_src_row(self, row):
-        """ Setter for _src_row """
-        self._src_row = row
+        """ Setter for the source row """
+        self._code = self._code & ~127 | row * 9 + self.get_src_col()
 
     def get_src_col(self):
-        """ Getter for _src_col """
-        return self._src_col
+        """ Getter for the source column """
+        return (self._code & 127) % 9
 
     def set_src_col(self, col):
-        """ Setter for _src_col """
-        self._src_col = col
+        """ Setter for the source column """
+        self._code = self._code & ~127 | self.get_src_row() * 9 + col
 
     def get_dst_row(self):
-        """ Getter for _dst_row """
-        return self._dst_row
+        """ Getter for the destination row """
+        return (self._code >> 7 & 127) // 9
 
     def set_dst_row(self, row):
-        """ Setter for _dst_row """
-        self._dst_row = row
+        """ Setter for the destination row """
+        self._code = self._code & ~(127 << 7) | (row * 9 + self.get_dst_col()) << 7
 
     def get_dst_col(self):
-        """ Getter for _dst_col """
-        return self._dst_col
+        """ Getter for the destination column """
+        return (self._code >> 7 & 127) % 9
 
     def set_dst_col(self, col):
-        """ Setter for _dst_col """
-        self._dst_col = col
+        """ Setter for the destination column """
+        self._code = self._code & ~(127 << 7) | (self.get_dst_row() * 9 + col) << 7
 
     def get_src_object(self):
         """ Getter for _src_object """
@@ -563,82 +1188,109 @@ class Move:
 
 class Piece:
     """ Parent class for the different Janggi pieces. Communicates with the JanggiGame
-     class to initialize piece types and various data members. """
-
-    def __init__(self, player):
-        """ Initializes a Piece object with a player and name data member"""
-        self._player = player
-        self._name = None
+     class to initialize piece types and various data members. Pieces are immutable flyweights: constructing a
+     piece returns the one shared instance for its type and player, so boards can be copied by reference and tiles
+     compared by identity. """
+
+    __slots__ = ('_player', '_name', '_code')
+    NAME = None
+    _instances = {}
+
+    def __new__(cls, player):
+        """ Returns the shared piece for this type and player, creating it with its player, name and code data
+        members the first time """
+        piece = Piece._instances.get((cls, player))
+        if piece is None:
+            piece = object.__new__(cls)
+            piece._player = player
+            piece._name = cls.NAME
+            piece._code = PIECE_CODES.get(cls.NAME, 0) | (RED_CODE if player == 'RED' else 0)
+            Piece._instances[(cls, player)] = piece
+        return piece
+
+    def __reduce__(self):
+        """ Pickles a piece as a call to its class, so unpickling returns the shared instance """
+        return self.__class__, (self._player,)
+
+    def __copy__(self):
+        """ Pieces are immutable, so a copy is the piece itself """
+        return self
+
+    def __deepcopy__(self, memo):
+        """ Pieces are immutable, so a copy is the piece itself """
+        return self
 
     def get_player(self):
         """ Returns the player who controls the piece """
         return self._player
 
     def set_player(self, player):
-        """ Setter method for the _player data member"""
-        self._player = player
+        """ Pieces are shared between boards and cannot change player """
+        raise AttributeError('Pieces are shared flyweights and cannot be modified')
 
     def get_name(self):
         """ Getter method for the _name data member """
         return self._name
 
     def set_name(self, name):
-        """ Setter method for the _name data member """
-        self._name = name
+        """ Pieces are shared between boards and cannot change name """
+        raise AttributeError('Pieces are shared flyweights and cannot be modified')
+
+    def get_code(self):
+        """ Returns the 4 bit piece code used in packed moves: PIECE_CODES for the type plus RED_CODE for RED """
+        return self._code
 
 
 class Soldier(Piece):
     """ Soldier subclass for soldier pieces """
-
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'SO'
+    __slots__ = ()
+    NAME = 'SO'
 
 
 class Cannon(Piece):
     """ Cannon subclass for cannon pieces """
-
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'CA'
+    __slots__ = ()
+    NAME = 'CA'
 
 
 class General(Piece):
     """ General subclass for general piece"""
-
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'GE'
+    __slots__ = ()
+    NAME = 'GE'
 
 
 class Chariot(Piece):
     """ Chariot subclass for chariot pieces """
-
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'CH'
+    __slots__ = ()
+    NAME = 'CH'
 
 
 class Horse(Piece):
     """ Horse subclass for horse/knight pieces """
-
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'HO'
+    __slots__ = ()
+    NAME = 'HO'
 
 
 class Elephant(Piece):
     """ Elephant subclass for elephant pieces """
-
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'EL'
+    __slots__ = ()
+    NAME = 'EL'
 
 
 class Guard(Piece):
     """ Guard subclass for guard pieces"""
+    __slots__ = ()
+    NAME = 'GU'
+
+
+PIECE_CLASSES = {'SO': Soldier, 'CA': Cannon, 'GE': General, 'CH': Chariot, 'HO': Horse, 'EL': Elephant, 'GU': Guard}
+PIECES = [[]] * 16  # The 14 shared pieces indexed by piece code, [] for codes without a piece
+for _name, _piece_class in PIECE_CLASSES.items():
+    PIECES[PIECE_CODES[_name]] = _piece_class('BLUE')
+    PIECES[PIECE_CODES[_name] | RED_CODE] = _piece_class('RED')
+del _name, _piece_class
 
-    def __init__(self, player):
-        super().__init__(player)
-        self._name = 'GU'
 
+def piece_from_code(code):
+    """ Returns the shared Piece for a 4 bit piece code, or [] for 0 (an empty tile) """
+    return PIECES[code] if code else []
@@ -0,0 +1,202 @@
+# Author: Ryan Bharat
+# Description: Streaming reader and writer for Janggi game records, in the Korean GIB format (moves such as 79졸78)
+# and a PGN-like text form using this project's location notation (moves such as c7c6). Records are read one game
+# at a time from any iterable of lines, so archives of any size are read in constant memory.
+
+import re
+
+from JanggiGame import JanggiGame, LOCATION_COORDINATES, GAME_STATES, START_FEN, square_name
+
+# GIB coordinates are the rank (1 to 9, then 0 for 10) followed by the file (1 to 9), so 79 is i7 and 03 is c10
+GIB_LOCATIONS = {}  # GIB coordinate to location string
+LOCATION_GIB = {}  # Location string to GIB coordinate
+for _square in range(90):
+    GIB_LOCATIONS[str((_square // 9 + 1) % 10) + str(_square % 9 + 1)] = square_name(_square)
+    LOCATION_GIB[square_name(_square)] = str((_square // 9 + 1) % 10) + str(_square % 9 + 1)
+del _square
+
+GIB_PIECE_NAMES = {'졸': 'SO', '병': 'SO', '차': 'CH', '마': 'HO', '상': 'EL', '사': 'GU', '포': 'CA', '장': 'GE',
+                   '궁': 'GE'}
+GIB_LETTERS = {('SO', 'BLUE'): '졸', ('SO', 'RED'): '병', ('CH', 'BLUE'): '차', ('CH', 'RED'): '차',
+               ('HO', 'BLUE'): '마', ('HO', 'RED'): '마', ('EL', 'BLUE'): '상', ('EL', 'RED'): '상',
+               ('GU', 'BLUE'): '사', ('GU', 'RED'): '사', ('CA', 'BLUE'): '포', ('CA', 'RED'): '포',
+               ('GE', 'BLUE'): '장', ('GE', 'RED'): '장'}
+GIB_PASS = '한수쉼'
+GIB_RESULT = '대국결과'  # GIB result tag, e.g. "초 완승" (BLUE wins) or "한 완승" (RED wins)
+GIB_SETUPS = ('초차림', '한차림')  # GIB tags for the order of the Horses and Elephants
+DEFAULT_SETUP = '상마상마'  # The order place_pieces uses
+
+PASS = 'pass'  # Pass token of the text form
+RESULT_TOKENS = set(GAME_STATES) | {'*'}
+TAG_LINE = re.compile(r'^\[(\S+)\s+"(.*)"\]$')
+GIB_MOVE = re.compile(r'^(\d\d)(\D+)(\d\d)$')
+TEXT_MOVE = re.compile(r'^([a-i](?:10|[1-9]))([a-i](?:10|[1-9]))$')
+MOVE_NUMBER = re.compile(r'^\d+\.$')
+LINE_WIDTH = 80
+
+
+class GameRecord:
+    """ A game as stored in a record file: its tags and its moves. Each move is a (source, destination) pair of
+    location strings, or None for a pass """
+
+    def __init__(self, tags=None, moves=None):
+        """ Initializes a record with a dict of tags and a list of moves """
+        self._tags = tags if tags is not None else {}
+        self._moves = moves if moves is not None else []
+
+    def get_tags(self):
+        """ Getter for the tags """
+        return self._tags
+
+    def get_moves(self):
+        """ Getter for the moves """
+        return self._moves
+
+    def get_result(self):
+        """ Returns the recorded result as a game state (BLUE_WON, RED_WON or UNFINISHED), or None if the record does
+        not give one """
+        result = self._tags.get('Result')
+        if result in GAME_STATES:
+            return result
+        result = self._tags.get(GIB_RESULT, '')
+        if result.startswith('초'):
+            return 'BLUE_WON'
+        if result.startswith('한'):
+            return 'RED_WON'
+        return None
+
+    def replay(self):
+        """ Plays the moves from the record's FEN tag, or from the start position, and returns the game. Raises
+        ValueError if a move is not valid or the record starts from a setup this board does not use """
+        check_setup(self._tags)
+        game = JanggiGame.from_fen(self._tags.get('FEN', START_FEN))
+        for number, move in enumerate(self._moves):
+            if move is None:  # Every pass leads to the same position, so the General passes
+                row, column = game.get_general_location(game.get_player_turn())
+                move = (square_name(row * 9 + column),) * 2
+            if not game.make_move(move[0], move[1]):
+                raise ValueError('invalid move %d: %s%s' % (number + 1, move[0], move[1]))
+        return game
+
+
+def check_setup(tags):
+    """ Raises ValueError if a record's GIB setup tags place the Horses and Elephants differently from the board """
+    for tag in GIB_SETUPS:
+        if tags.get(tag, DEFAULT_SETUP).replace(' ', '') != DEFAULT_SETUP:
+            raise ValueError('unsupported setup ' + tags[tag])
+
+
+def record_from_game(game, tags=None):
+    """ Returns a GameRecord of the moves played on a game, with the game state as its Result tag """
+    tags = dict(tags) if tags is not None else {}
+    tags.setdefault('Result', game.get_game_state())
+    moves = []
+    for move in game.get_move_history():
+        source, destination = square_name(move & 127), square_name(move >> 7 & 127)
+        moves.append(None if source == destination else (source, destination))
+    return GameRecord(tags, moves)
+
+
+def parse_move(token):
+    """ Converts a move token in either notation to a (source, destination) pair, None for a pass, or returns False
+    if the token is not a move """
+    if token == PASS or token == GIB_PASS:
+        return None
+    match = GIB_MOVE.match(token)
+    if match and match.group(2) in GIB_PIECE_NAMES and match.group(1) in GIB_LOCATIONS \
+            and match.group(3) in GIB_LOCATIONS:
+        move = (GIB_LOCATIONS[match.group(1)], GIB_LOCATIONS[match.group(3)])
+    else:
+        match = TEXT_MOVE.match(token)
+        if not match:
+            return False
+        move = (match.group(1), match.group(2))
+    return None if move[0] == move[1] else move
+
+
+def read_games(lines):
+    """ Generator that reads games from an iterable of lines (such as an open file) and yields a GameRecord for each
+    one as soon as it ends. A game is a block of [Tag "value"] lines followed by its moves, ending at a blank line
+    or the next tag line. Move numbers are skipped and a trailing result token becomes the Result tag. Raises
+    ValueError for a token that is not a move """
+    tags = {}
+    moves = []
+    in_moves = False
+    for line in lines:
+        line = line.strip().lstrip('﻿')
+        match = TAG_LINE.match(line)
+        if in_moves and (not line or match):
+            yield GameRecord(tags, moves)
+            tags, moves, in_moves = {}, [], False
+        if match:
+            tags[match.group(1)] = match.group(2)
+            continue
+        for token in line.split():
+            if MOVE_NUMBER.match(token):
+                continue
+            in_moves = True
+            if token in RESULT_TOKENS:
+                tags.setdefault('Result', token)
+                continue
+            move = parse_move(token)
+            if move is False:
+                raise ValueError('unreadable move ' + token)
+            moves.append(move)
+    if in_moves or tags:
+        yield GameRecord(tags, moves)
+
+
+def read_game_file(path, encoding='utf-8'):
+    """ Generator that yields the games of a record file one at a time. GIB files are often encoded as cp949 """
+    with open(path, encoding=encoding, errors='replace') as record_file:
+        for record in read_games(record_file):
+            yield record
+
+
+def format_game(record, notation='text'):
+    """ Returns a record as text in the 'text' (c7c6) or 'gib' (79졸78) notation, ending with a blank line. GIB moves
+    name the moving piece, so the game is replayed to find it """
+    lines = ['[%s "%s"]' % (tag, value) for tag, value in record.get_tags().items()]
+    tokens = []
+    if notation == 'gib':
+        game = JanggiGame.from_fen(record.get_tags().get('FEN', START_FEN))
+        for number, move in enumerate(record.get_moves()):
+            tokens.append('%d.' % (number + 1))
+            if move is None:
+                tokens.append(GIB_PASS)
+                row, column = game.get_general_location(game.get_player_turn())
+                move = (square_name(row * 9 + column),) * 2
+            else:
+                piece = game.get_tile_occupant(LOCATION_COORDINATES[move[0]])
+                if piece == []:
+                    raise ValueError('no piece on ' + move[0])
+                tokens.append(LOCATION_GIB[move[0]] + GIB_LETTERS[(piece.get_name(), piece.get_player())] +
+                              LOCATION_GIB[move[1]])
+            if not game.make_move(move[0], move[1]):
+                raise ValueError('invalid move %d: %s%s' % (number + 1, move[0], move[1]))
+    else:
+        for number, move in enumerate(record.get_moves()):
+            if number % 2 == 0:
+                tokens.append('%d.' % (number // 2 + 1))
+            tokens.append(PASS if move is None else move[0] + move[1])
+        tokens.append(record.get_tags().get('Result', '*'))
+    lines.append('')
+    line = ''
+    for token in tokens:
+        if line and len(line) + len(token) + 1 > LINE_WIDTH:
+            lines.append(line)
+            line = token
+        else:
+            line = line + ' ' + token if line else token
+    if line:
+        lines.append(line)
+    return '\n'.join(lines) + '\n\n'
+
+
+def write_games(stream, records, notation='text'):
+    """ Writes records, from any iterable, to an open text stream one game at a time. Returns the number written """
+    count = 0
+    for record in records:
+        stream.write(format_game(record, notation))
+        count += 1
+    return count
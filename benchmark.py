@@ -0,0 +1,133 @@
+# Benchmarks: times move generation, legality checking, check detection, make_move and full game replay over a fixed
+# corpus of opening, middlegame and endgame positions, and reports JSON with ops/sec and percentiles.
+# Usage: python benchmark.py [--quick] [--output results.json] [--baseline baseline.json] [--tolerance 0.1]
+# Exits with status 1 when an operation is slower than the baseline by more than the tolerance.
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from JanggiGame import JanggiGame, move_src, move_dst, square_name
+from perft import play_moves
+
+GAME = ['c7c6', 'c1d3', 'b10d7', 'b3e3', 'c10d8', 'h1g3', 'e7e6', 'e3e6', 'h8c8', 'd3e5', 'c8c4', 'e5c4', 'i10i8',
+        'g4f4', 'i8f8', 'g3h5', 'h10g8', 'e6e3', 'e9d9', 'c4e5', 'c6d6', 'e5c4', 'a7a6', 'h3h9', 'a10a7', 'c4d6',
+        'a6b6', 'h5g7', 'b8b1', 'a1b1', 'a7a4', 'b1c1', 'a4a2', 'e2e1', 'i7h7', 'c1c9']  # RED wins by checkmate
+
+CORPUS = [  # (category, name, FEN)
+    ('opening', 'start', 'rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR w - - 0 1'),
+    ('opening', 'horses-out', 'rb1a1ab1r/4k4/3nc1nc1/p1p1p1p1p/9/2P6/P2BP1P1P/1C1N3C1/4K4/R2A1ABNR w - - 6 4'),
+    ('middlegame', 'chariot-raid', 'rb1a1ab1r/4k4/6nc1/p1n1pp2p/9/2P1c4/P2B2P1P/1C1N4R/4K4/R2A1ABN1 w - - 2 8'),
+    ('middlegame', 'open-files', 'rb1a1ab1r/4k4/4c4/p1n1pp2p/7n1/P2P5/3B2P1P/1C1N1RN2/3K3c1/R2A1AB2 w - - 12 13'),
+    ('middlegame', 'mating-attack', '2ra1ab1r/R3k4/4c4/4pp2p/9/1P1n5/3B2n1P/3N1RN2/3K3c1/3A1AB2 b - - 2 17'),
+    ('endgame', 'chariot-and-soldiers', '5a2r/4k4/2n6/p7p/9/9/2P1P4/9/4K4/R2A5 w - - 0 1'),
+    ('endgame', 'cannon-and-horse', '4a1b2/3k5/9/6p2/9/2p1P4/9/1C7/4K4/2N6 w - - 0 1'),
+]
+
+
+def percentile(values, fraction):
+    """ Returns the nearest-rank percentile of a sorted list """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(operation, samples):
+    """ Times operation over samples samples, each repeating it enough times to run for about 2ms. Returns ops/sec
+    and the 50th, 90th and 99th percentile time per call in microseconds """
+    start = time.perf_counter()
+    operation()
+    repeat = max(1, int(0.002 / max(time.perf_counter() - start, 1e-7)))
+    times = []
+    for sample in range(samples):
+        start = time.perf_counter()
+        for call in range(repeat):
+            operation()
+        times.append((time.perf_counter() - start) / repeat)
+    total = sum(times)
+    times.sort()
+    return {'ops_per_sec': round(len(times) / total, 1) if total > 0 else 0.0,
+            'p50_us': round(percentile(times, 0.5) * 1e6, 2),
+            'p90_us': round(percentile(times, 0.9) * 1e6, 2),
+            'p99_us': round(percentile(times, 0.99) * 1e6, 2),
+            'calls': samples * repeat}
+
+
+def position_operations(game):
+    """ Returns the (name, operation) pairs timed on a corpus position. None of them leaves the position changed """
+    turn = game.get_player_turn()
+    mover = 'RED' if turn == 'BLUE' else 'BLUE'  # The player whose move reached the position
+    moves = [move for move in game.get_all_valid_moves() if move_src(move) != move_dst(move)]
+    source, destination = square_name(move_src(moves[0])), square_name(move_dst(moves[0]))
+    checking = JanggiGame.decode(game.encode())  # Its own copy, so its memoised moves never reach make_move
+    state = checking.get_game_state()
+
+    def check_after_move():
+        """ Runs check_in_check the way play_move does: before the turn passes and with no memoised moves for the
+        player to move, so a check also times the checkmate test's move generation """
+        checking.set_player_turn(mover)
+        checking.set_in_check(turn, False)
+        checking.clear_legal_moves()
+        checking.check_in_check(mover)
+        checking.set_player_turn(turn)
+        checking.set_game_state(state)
+
+    def make_and_unmake():
+        game.make_move(source, destination)
+        game.unmake_move()
+
+    return [('get_all_possible_moves', game.get_all_possible_moves),
+            ('get_all_valid_moves', game.get_all_valid_moves),
+            ('check_in_check', check_after_move),
+            ('make_move', make_and_unmake)]
+
+
+def run(samples):
+    """ Runs every benchmark and returns the results keyed by operation/category/position """
+    results = {}
+    for category, name, fen in CORPUS:
+        game = JanggiGame.from_fen(fen)
+        for operation, call in position_operations(game):
+            results[operation + '/' + category + '/' + name] = measure(call, samples)
+    results['replay/full-game'] = measure(lambda: play_moves(JanggiGame(), GAME), samples)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """ Returns (name, baseline ops/sec, ops/sec) for every result slower than the baseline by more than tolerance """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name in baseline and result['ops_per_sec'] < baseline[name]['ops_per_sec'] * (1 - tolerance):
+            regressions.append((name, baseline[name]['ops_per_sec'], result['ops_per_sec']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the JanggiGame rules over a fixed corpus of positions')
+    parser.add_argument('--samples', type=int, default=30, help='timing samples per operation')
+    parser.add_argument('--quick', action='store_true', help='5 samples per operation')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='slowdown allowed before failing, 0.10 = 10%%')
+    args = parser.parse_args()
+    report = {'python': platform.python_version(), 'platform': platform.platform(),
+              'results': run(5 if args.quick else args.samples)}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report['results'], json.load(baseline_file)['results'], args.tolerance)
+        report['regressions'] = [{'name': name, 'baseline_ops_per_sec': old, 'ops_per_sec': new}
+                                 for name, old, new in regressions]
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(text + '\n')
+    else:
+        print(text)
+    for name, old, new in regressions:
+        print('REGRESSION %s: %.1f -> %.1f ops/sec' % (name, old, new), file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
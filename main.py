@@ -43,7 +43,7 @@ def main():
                 row = location[1] // SQ_SIZE
                 sq_selected = (row, col)
                 player_clicks.append(sq_selected)
-                valid = game.get_all_valid_moves()
+                valid = game.legal_moves()
             if len(player_clicks) == 2:
                 src_coord = index_to_column[player_clicks[0][1]] + index_to_row[player_clicks[0][0]]
                 dst_coord = index_to_column[player_clicks[1][1]] + index_to_row[player_clicks[1][0]]
@@ -102,8 +102,9 @@ def highlight_tiles(screen, game_object, valid_moves, sq_selected):
             # highlight moves from that square
             s.fill(pygame.Color('yellow'))
             for move in valid_moves:
-                if move.get_src_row() == r and move.get_src_col() == c:
-                    screen.blit(s, (move.get_dst_col()*SQ_SIZE, move.get_dst_row()*SQ_SIZE))
+                src, dst = JanggiGame.move_coordinates(move)
+                if src == (r, c):
+                    screen.blit(s, (dst[1]*SQ_SIZE, dst[0]*SQ_SIZE))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+# Perft: counts the move paths from a position to validate and time the move generator.
+# Usage: python perft.py DEPTH [--fen FEN] [--moves c7c6 c1d3 ...] [--hashed] [--hash-mb MB] [--workers N]
+#                          [--speedup]
+
+import argparse
+import multiprocessing
+import time
+
+from JanggiEngine import BucketTable
+from JanggiGame import JanggiGame, START_FEN, move_name
+
+PERFT_TABLE_MB = 64  # Default size of a PerftTable
+
+_worker_table = None  # PerftTable of a worker process, kept between root moves when hashing
+_worker_game = None  # Game a worker process decodes each root position into
+
+
+class PerftTable(BucketTable):
+    """ BucketTable of the perft counts below positions, for JanggiGame.hashed_perft. Keys are position hash ^ depth
+    and entries pack the count above the depth, count << 8 | depth """
+
+    def entry_depth(self, data):
+        """ Returns the depth packed into an entry """
+        return data & 0xFF
+
+    def probe(self, key, depth):
+        """ Returns the count stored for key at depth, or None if it is not in the table """
+        data = self.probe_entry(key)
+        return data >> 8 if data is not None and data & 0xFF == depth else None
+
+    def store(self, key, depth, count):
+        """ Stores the count below a position. Depth is at least 1, so an entry is never 0 """
+        self.store_entry(key, depth, count << 8 | depth)
+
+
+def play_moves(game, moves):
+    """ Plays location string moves such as c7c6 or b10d8 on the game, raising ValueError on an invalid one """
+    for move in moves:
+        split = 3 if len(move) > 2 and move[2].isdigit() else 2
+        if not game.make_move(move[:split], move[split:]):
+            raise ValueError('invalid move ' + move)
+
+
+def _init_worker(hashed, table_mb):
+    """ Gives a worker process its own game, and its own table_mb megabyte PerftTable when hashing """
+    global _worker_table, _worker_game
+    _worker_table = PerftTable(table_mb) if hashed else None
+    _worker_game = JanggiGame()
+
+
+def _count_root_move(task):
+    """ Plays one root move in a worker process and returns (move, perft count below it) """
+    position, move, depth = task
+    game = _worker_game
+    game.set_encoded(position)
+    game.play_move(move)
+    if _worker_table is None:
+        return move, game.perft(depth - 1)
+    return move, game.hashed_perft(depth - 1, _worker_table)
+
+
+def divide(game, depth, hashed=False, workers=1, table_mb=PERFT_TABLE_MB):
+    """ Returns the divide counts of the game's position, walking the tree with hashed_perft if hashed and splitting
+    the root moves over a pool of worker processes if workers is more than 1. Every process hashing gets its own
+    table_mb megabyte PerftTable, so hashing over workers processes takes workers * table_mb megabytes """
+    if workers <= 1:
+        return game.divide(depth, PerftTable(table_mb) if hashed else None)
+    position = game.encode()  # Sent to the workers instead of pickling the whole game
+    tasks = [(position, move, depth) for move in game.legal_moves()]
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(hashed, table_mb)) as pool:
+        return dict(pool.imap_unordered(_count_root_move, tasks))
+
+
+def timed_divide(game, depth, hashed, workers, table_mb=PERFT_TABLE_MB):
+    """ Returns the divide counts and the seconds they took """
+    start = time.perf_counter()
+    counts = divide(game, depth, hashed, workers, table_mb) if depth > 0 else {}
+    return counts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count the move paths DEPTH plies deep from a position')
+    parser.add_argument('depth', type=int)
+    parser.add_argument('--fen', default=START_FEN, help='position to count from, the start position by default')
+    parser.add_argument('--moves', nargs='*', default=[], help='moves to play from the position, e.g. c7c6 c1d3')
+    parser.add_argument('--hashed', action='store_true', help='cache subtree counts by position hash and depth')
+    parser.add_argument('--hash-mb', type=float, default=PERFT_TABLE_MB,
+                        help='size of the subtree count table of each process, %d MB by default' % PERFT_TABLE_MB)
+    parser.add_argument('--workers', type=int, default=1, help='split the root moves over this many processes')
+    parser.add_argument('--speedup', action='store_true', help='also run serially and report the speedup')
+    args = parser.parse_args()
+    game = JanggiGame.from_fen(args.fen)
+    play_moves(game, args.moves)
+    counts, elapsed = timed_divide(game, args.depth, args.hashed, args.workers, args.hash_mb)
+    for move in sorted(counts, key=move_name):
+        print(move_name(move) + ': ' + str(counts[move]))
+    total = sum(counts.values()) if args.depth > 0 else 1
+    print()
+    print('Nodes searched: ' + str(total))
+    print('Time: %.3fs' % elapsed)
+    print('Nodes/second: ' + str(int(total / elapsed) if elapsed > 0 else 0))
+    if args.speedup:
+        serial_counts, serial_elapsed = timed_divide(game, args.depth, False, 1)
+        if serial_counts != counts:
+            raise SystemExit('Serial counts differ: ' + str(sum(serial_counts.values())))
+        print('Serial time: %.3fs' % serial_elapsed)
+        print('Speedup: %.2fx' % (serial_elapsed / elapsed if elapsed > 0 else 0))
+
+
+if __name__ == "__main__":
+    main()
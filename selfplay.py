@@ -0,0 +1,109 @@
+# Self-play: plays complete JanggiGame games between move policies across a pool of worker processes, without the
+# pygame interface, and streams a record of every finished game back as JSON lines.
+# Usage: python selfplay.py [--games 100] [--workers N] [--blue random] [--red greedy] [--max-plies 300]
+#                           [--seed 0] [--output games.jsonl]
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from JanggiGame import JanggiGame, MATERIAL, PIECES, move_src, move_dst, move_captured, move_name
+
+
+def random_policy(game, moves, rng):
+    """ Picks a move uniformly at random. All the passes of a position count as a single choice """
+    moving = [move for move in moves if move_src(move) != move_dst(move)]
+    if len(moving) < len(moves):
+        moving.append(next(move for move in moves if move_src(move) == move_dst(move)))
+    return rng.choice(moving)
+
+
+def greedy_capture_policy(game, moves, rng):
+    """ Captures the most valuable piece it can, picking randomly between equal captures, and otherwise plays like
+    random_policy """
+    best_value = 0
+    best_moves = []
+    for move in moves:
+        if move_captured(move):
+            value = MATERIAL[PIECES[move_captured(move)].get_name()]
+            if value > best_value:
+                best_value = value
+                best_moves = [move]
+            elif value == best_value:
+                best_moves.append(move)
+    if best_moves:
+        return rng.choice(best_moves)
+    return random_policy(game, moves, rng)
+
+
+POLICIES = {'random': random_policy, 'greedy': greedy_capture_policy}
+
+
+def play_game(task):
+    """ Plays one game and returns its record. task is (index, seed, blue policy, red policy, max plies), where a
+    policy is a function (game, legal moves, random.Random) -> move. Games still going after max plies are recorded as
+    UNFINISHED """
+    index, seed, blue_policy, red_policy, max_plies = task
+    rng = random.Random(seed)
+    game = JanggiGame()
+    policies = {'BLUE': blue_policy, 'RED': red_policy}
+    moves = []
+    while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+        legal = game.legal_moves()
+        if not legal:
+            break
+        move = policies[game.get_player_turn()](game, legal, rng)
+        game.play_move(move)
+        moves.append(move_name(move))
+    return {'game': index, 'seed': seed, 'result': game.get_game_state(), 'plies': len(moves), 'moves': moves}
+
+
+def selfplay(games, blue_policy=random_policy, red_policy=random_policy, workers=None, max_plies=300, seed=0):
+    """ Generator that plays games games on a pool of worker processes (one per CPU by default) and yields each game
+    record as soon as it finishes, so records arrive out of order. Game i is played with seed + i, so the same
+    arguments always produce the same games. Policies must be module level functions so they can be sent to the
+    workers """
+    workers = workers if workers is not None else os.cpu_count() or 1
+    tasks = [(index, seed + index, blue_policy, red_policy, max_plies) for index in range(games)]
+    if workers <= 1:
+        for task in tasks:
+            yield play_game(task)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        for record in pool.imap_unordered(play_game, tasks, chunksize=max(1, games // (workers * 8))):
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play JanggiGame games between move policies')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, one per CPU by default')
+    parser.add_argument('--blue', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--red', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--max-plies', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the game records to this file as JSON lines instead of stdout')
+    args = parser.parse_args()
+    output = open(args.output, 'w') if args.output else sys.stdout
+    results = {}
+    plies = 0
+    start = time.perf_counter()
+    for record in selfplay(args.games, POLICIES[args.blue], POLICIES[args.red], args.workers, args.max_plies,
+                           args.seed):
+        output.write(json.dumps(record) + '\n')
+        results[record['result']] = results.get(record['result'], 0) + 1
+        plies += record['plies']
+    elapsed = time.perf_counter() - start
+    if args.output:
+        output.close()
+    print('games: %d  results: %s' % (args.games, json.dumps(results, sort_keys=True)), file=sys.stderr)
+    print('time: %.2fs  games/sec: %.2f  plies/sec: %.0f' % (elapsed, args.games / elapsed, plies / elapsed),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
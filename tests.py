@@ -1,5 +1,9 @@
 import unittest
 from JanggiGame import JanggiGame
+from benchmark import GAME
+
+# The benchmark's replay game, in which RED wins by checkmate, as (source, destination) location pairs
+RED_WIN = [(move[:3], move[3:]) if move[2].isdigit() else (move[:2], move[2:]) for move in GAME]
 
 
 class TestJanggiGame(unittest.TestCase):
@@ -1714,3 +1718,696 @@ class TestJanggiGame(unittest.TestCase):
         except:
             self.fail("Game state should be RED_WON when the BLUE general is checkmated")
 
+
+    def test_square_attacked_by_chariot_and_cannon(self):
+        """ATTACKS: test that is_square_attacked finds chariot lines and cannon screens from the opening position"""
+        g = JanggiGame()
+        self.assertIs(g.is_square_attacked((1, 0), 'RED'), True)  # red chariot on a1 covers a2
+        self.assertIs(g.is_square_attacked((5, 1), 'BLUE'), False)  # blue cannon on b8 has no screen up the b file
+        g.make_move('a7', 'b7')  # blue soldier becomes a screen for the cannon
+        self.assertIs(g.is_square_attacked((5, 1), 'BLUE'), True)
+        self.assertIs(g.is_square_attacked((2, 1), 'BLUE'), False)  # cannons cannot capture cannons
+
+    def test_square_attacked_by_horse_needs_a_clear_leg(self):
+        """ATTACKS: test that a horse only attacks squares whose leg is clear"""
+        g = JanggiGame()
+        self.assertIs(g.is_square_attacked((7, 3), 'BLUE'), True)  # blue horse on c10 reaches d8
+        self.assertEqual(g.get_attackers((8, 0), 'BLUE'), [(9, 0)])  # c10 horse is blocked by the b10 elephant
+        self.assertEqual(g.get_attackers((2, 6), 'RED'), [(0, 7)])  # g3 is only reached by the h1 horse
+
+    def test_move_tables(self):
+        """TABLES: test the precomputed leap and step tables against hand-worked squares"""
+        from JanggiGame import HORSE_MOVES, ELEPHANT_MOVES, FORTRESS_MOVES, SOLDIER_MOVES
+        self.assertEqual(len(HORSE_MOVES[4][4]), 8)
+        self.assertEqual(sorted(end[2:] for end in HORSE_MOVES[0][0]), [(1, 2), (2, 1)])
+        self.assertIn((8, 2, 7, 1, 6, 0), ELEPHANT_MOVES[9][2])  # legs c9 and b8, landing on a7
+        self.assertEqual(sorted(FORTRESS_MOVES[8][4]), [(7, 3), (7, 4), (7, 5), (8, 3), (8, 5), (9, 3), (9, 4), (9, 5)])
+        self.assertEqual(sorted(SOLDIER_MOVES['BLUE'][2][3]), [(1, 3), (1, 4), (2, 2), (2, 4)])
+        self.assertEqual(sorted(SOLDIER_MOVES['RED'][9][0]), [(9, 1)])
+
+    def test_cannon_jumps_along_fortress_diagonal(self):
+        """CANNON: test a cannon can jump a screen along a fortress diagonal but not over another cannon"""
+        from JanggiGame import Cannon, General, Guard
+        g = JanggiGame()
+        for row in range(10):
+            for column in range(9):
+                g.set_janggi_board(row, column, [])
+        g.set_janggi_board(8, 3, General('BLUE'))
+        g.set_janggi_board(1, 4, General('RED'))
+        g.set_janggi_board(9, 3, Cannon('BLUE'))
+        g.set_janggi_board(8, 4, Guard('BLUE'))
+        g.set_janggi_board(9, 5, Cannon('BLUE'))
+        g.set_janggi_board(7, 3, Cannon('RED'))
+        self.assertIs(g.make_move('f10', 'd8'), False)  # cannot capture the red cannon
+        self.assertIs(g.make_move('d10', 'f8'), True)  # jumps the guard from corner to corner
+
+
+class TestLegalMoves(unittest.TestCase):
+    def legal_names(self, fen):
+        """ Returns the legal moves of a FEN position as location strings such as e7e6 """
+        from JanggiGame import move_name
+        return sorted(move_name(move) for move in JanggiGame.from_fen(fen).legal_moves())
+
+    def test_pinned_piece_stays_on_the_line(self):
+        """LEGALITY: test a piece pinned on the General's file or fortress diagonal cannot leave the line"""
+        moves = self.legal_names('9/3k5/9/4r4/9/9/4R4/9/4K4/9 w - - 0 1')  # red chariot e4 pins the e7 chariot
+        self.assertEqual([move for move in moves if move.startswith('e7')], ['e7e4', 'e7e5', 'e7e6', 'e7e7', 'e7e8'])
+        moves = self.legal_names('9/4k4/9/9/9/9/9/3K5/4A4/5r3 w - - 0 1')  # red chariot f10 pins the e9 guard
+        self.assertEqual([move for move in moves if move.startswith('e9')], ['e9e9', 'e9f10'])
+
+    def test_discovered_check_through_legs_and_screens(self):
+        """LEGALITY: test moving off a horse leg, an elephant leg or one of two cannon screens, or onto an open cannon
+        line, is refused"""
+        moves = self.legal_names('9/4k4/9/9/9/9/3n5/3P5/4K4/9 w - - 0 1')  # d8 soldier on the d7 horse's leg
+        self.assertEqual([move for move in moves if move.startswith('d8')], ['d8d7', 'd8d8'])
+        moves = self.legal_names('9/4k4/9/9/9/2b6/9/3A5/4K4/9 w - - 0 1')  # d8 guard on the c6 elephant's leg
+        self.assertEqual([move for move in moves if move.startswith('d8')], ['d8d8'])
+        moves = self.legal_names('9/3k5/9/4c4/9/4N4/4P4/9/4K4/9 w - - 0 1')  # e6 horse and e7 soldier screen e4
+        self.assertEqual([move for move in moves if move[:2] in ('e6', 'e7')], ['e6e6', 'e7e7'])
+        moves = self.legal_names('9/3k5/9/4c4/9/R8/9/9/4K4/9 w - - 0 1')  # a6 chariot would become a screen
+        self.assertIn('a6d6', moves)
+        self.assertNotIn('a6e6', moves)
+
+    def test_capturing_the_checking_horse(self):
+        """LEGALITY: test a check from a horse can be answered by a capture from off the General's lines, and that no
+        pass is allowed while in check"""
+        g = JanggiGame.from_fen('9/4k4/9/9/9/9/R2n5/9/4K4/9 w - - 0 1')
+        self.assertIs(g.is_in_check('blue'), True)
+        self.assertEqual(self.legal_names(g.to_fen()),
+                         ['a7d7', 'e9d10', 'e9d8', 'e9d9', 'e9e10', 'e9e8', 'e9f10', 'e9f9'])
+        self.assertIs(g.make_move('a7', 'a6'), False)
+        self.assertIs(g.make_move('a7', 'a7'), False)
+        self.assertIs(g.make_move('a7', 'd7'), True)
+        self.assertIs(g.is_in_check('blue'), False)
+
+    def test_shielding_piece_may_pass(self):
+        """LEGALITY: test a pinned piece can still pass, since passing leaves the shield in place"""
+        g = JanggiGame.from_fen('9/3k5/9/4r4/9/9/4R4/9/4K4/9 w - - 0 1')
+        self.assertIs(g.make_move('e7', 'e7'), True)
+        self.assertEqual(g.get_player_turn(), 'RED')
+        self.assertIs(g.is_in_check('blue'), False)
+
+
+class TestBitboardJanggiGame(unittest.TestCase):
+    def test_bitboard_game_detects_checkmate(self):
+        """BITBOARD: test the bitboard core plays the red win game with the same results as JanggiGame"""
+        from JanggiBitboard import BitboardJanggiGame
+        g = JanggiGame()
+        b = BitboardJanggiGame()
+        for source, destination in RED_WIN:
+            self.assertIs(b.make_move(source, destination), g.make_move(source, destination))
+            self.assertIs(b.is_in_check('red'), g.is_in_check('red'))
+            self.assertIs(b.is_in_check('blue'), g.is_in_check('blue'))
+        self.assertEqual(b.get_game_state(), 'RED_WON')
+        self.assertIs(b.make_move('e1', 'e2'), False)
+
+    def test_bitboard_game_matches_valid_moves(self):
+        """BITBOARD: test the bitboard core generates the same valid moves as JanggiGame in the opening"""
+        from JanggiBitboard import BitboardJanggiGame
+        g = JanggiGame()
+        b = BitboardJanggiGame()
+        for source, destination in [('c7', 'c6'), ('c4', 'c5'), ('b8', 'e8'), ('b3', 'e3'), ('e7', 'f7')]:
+            self.assertEqual(sorted(b.get_all_valid_moves()), sorted(g.get_all_valid_moves()))
+            g.make_move(source, destination)
+            b.make_move(source, destination)
+        self.assertEqual(b.get_player_turn(), g.get_player_turn())
+
+
+class TestPackedMoves(unittest.TestCase):
+    def test_encode_and_decode_move(self):
+        """MOVES: test packed move ints round trip and carry the moving and captured piece codes"""
+        from JanggiGame import encode_move, decode_move, move_coordinates, PIECE_CODES, RED_CODE
+        move = encode_move(89, 0, PIECE_CODES['CH'], PIECE_CODES['CH'] | RED_CODE)
+        self.assertEqual(decode_move(move), (89, 0, 5, 13))
+        self.assertEqual(move_coordinates(move), ((9, 8), (0, 0)))
+
+    def test_generated_moves_wrap_as_move_objects(self):
+        """MOVES: test generated moves are ints that Move.from_code turns back into Move objects"""
+        from JanggiGame import Move
+        g = JanggiGame()
+        moves = g.get_all_valid_moves()
+        self.assertTrue(all(isinstance(move, int) for move in moves))
+        wrapped = [Move.from_code(move) for move in moves]
+        self.assertIn(Move((6, 2), (5, 2), g.get_janggi_board()), wrapped)  # c7 to c6 soldier move
+        soldier_move = wrapped[wrapped.index(Move((6, 2), (5, 2), g.get_janggi_board()))]
+        self.assertEqual(soldier_move.get_src_object().get_name(), 'SO')
+        self.assertEqual(soldier_move.get_dst_object(), [])
+
+    def test_moves_are_hashable(self):
+        """MOVES: test Move objects hash by move id so they can be looked up in sets"""
+        from JanggiGame import Move
+        g = JanggiGame()
+        legal = {Move.from_code(move) for move in g.get_all_valid_moves()}
+        self.assertIn(Move((6, 2), (5, 2), g.get_janggi_board()), legal)
+        self.assertNotIn(Move((6, 2), (7, 2), g.get_janggi_board()), legal)
+
+    def test_valid_moves_from_a_source(self):
+        """MOVES: test that moves for a single source match the full valid move list"""
+        from JanggiGame import move_src
+        g = JanggiGame()
+        g.make_move('c7', 'c6')
+        g.make_move('c4', 'c5')
+        every = g.get_all_valid_moves()
+        for row in range(10):
+            for column in range(9):
+                expected = [move for move in every if move_src(move) == row * 9 + column]
+                self.assertEqual(sorted(g.get_valid_moves_from((row, column))), sorted(expected))
+
+
+class TestPieces(unittest.TestCase):
+    def test_pieces_are_shared_flyweights(self):
+        """PIECES: test that pieces of the same type and player are one shared, slotted, immutable instance"""
+        import copy
+        import pickle
+        from JanggiGame import Soldier, Chariot, piece_from_code
+        self.assertIs(Soldier('BLUE'), Soldier('BLUE'))
+        self.assertIsNot(Soldier('BLUE'), Soldier('RED'))
+        self.assertIs(piece_from_code(Chariot('RED').get_code()), Chariot('RED'))
+        self.assertIs(copy.deepcopy(Soldier('RED')), Soldier('RED'))
+        self.assertIs(pickle.loads(pickle.dumps(Soldier('RED'))), Soldier('RED'))
+        self.assertFalse(hasattr(Soldier('BLUE'), '__dict__'))
+        self.assertRaises(AttributeError, Soldier('BLUE').set_player, 'RED')
+
+    def test_board_holds_fourteen_distinct_pieces(self):
+        """PIECES: test that the starting board is built from the 14 shared pieces"""
+        g = JanggiGame()
+        pieces = {id(tile) for row in g.get_janggi_board() for tile in row if tile != []}
+        self.assertEqual(len(pieces), 14)
+
+    def test_legal_moves_are_memoised_until_the_board_changes(self):
+        """MOVES: test legal_moves returns the same list until a move is made"""
+        g = JanggiGame()
+        first = g.legal_moves()
+        self.assertIs(g.legal_moves(), first)
+        self.assertEqual(sorted(first), sorted(g.get_all_valid_moves()))
+        g.make_move('c7', 'c6')
+        self.assertIsNot(g.legal_moves(), first)
+        self.assertEqual(sorted(g.legal_moves()), sorted(g.get_all_valid_moves()))
+
+
+class TestPositionHash(unittest.TestCase):
+    def test_transpositions_share_a_hash(self):
+        """HASH: test two move orders reaching the same position give the same hash"""
+        first = JanggiGame()
+        for source, destination in [('c7', 'c6'), ('c4', 'c5'), ('g7', 'g6'), ('g4', 'g5')]:
+            first.make_move(source, destination)
+        second = JanggiGame()
+        for source, destination in [('g7', 'g6'), ('g4', 'g5'), ('c7', 'c6'), ('c4', 'c5')]:
+            second.make_move(source, destination)
+        self.assertEqual(first.position_hash(), second.position_hash())
+        self.assertEqual(first.position_hash(), first.compute_position_hash())
+
+    def test_hash_includes_side_to_move(self):
+        """HASH: test a pass changes the hash and a second pass restores it"""
+        g = JanggiGame()
+        start = g.position_hash()
+        g.make_move('a7', 'a7')
+        self.assertNotEqual(g.position_hash(), start)
+        g.make_move('a4', 'a4')
+        self.assertEqual(g.position_hash(), start)
+
+
+class TestUnmakeMove(unittest.TestCase):
+    def snapshot(self, g):
+        """ Returns everything unmake_move must restore """
+        return ([row[:] for row in g.get_janggi_board()], g.get_player_turn(), g.is_in_check('blue'),
+                g.is_in_check('red'), g.get_game_state(), g.position_hash())
+
+    def test_unmake_restores_every_position(self):
+        """UNDO: test unmake_move walks a game with captures and checks back to the start"""
+        g = JanggiGame()
+        snapshots = []
+        for source, destination in RED_WIN:
+            snapshots.append(self.snapshot(g))
+            self.assertIs(g.make_move(source, destination), True)
+        self.assertEqual(g.get_game_state(), 'RED_WON')
+        self.assertEqual(len(g.get_move_history()), len(RED_WIN))
+        while snapshots:
+            self.assertIs(g.unmake_move(), True)
+            self.assertEqual(self.snapshot(g), snapshots.pop())
+        self.assertIs(g.unmake_move(), False)
+        self.assertEqual(g.position_hash(), g.compute_position_hash())
+        self.assertIs(g.make_move('c7', 'c6'), True)
+
+    def test_play_move_and_unmake_keep_legal_moves(self):
+        """UNDO: test that unmaking a move gives back the memoised legal moves of the position"""
+        g = JanggiGame()
+        legal = g.legal_moves()
+        g.play_move(legal[0])
+        g.unmake_move()
+        self.assertIs(g.legal_moves(), legal)
+
+
+class TestEngine(unittest.TestCase):
+    def test_engine_finds_mate_in_one(self):
+        """ENGINE: test the search finds the checkmating move and leaves the game untouched"""
+        from JanggiEngine import best_move, SearchLimits, MATE_SCORE
+        g = JanggiGame()
+        for source, destination in RED_WIN[:-1]:
+            g.make_move(source, destination)
+        before = g.position_hash()
+        result = best_move(g, SearchLimits(depth=3))
+        self.assertEqual(result.get_move(), g.get_move_code(g.convert_location('c1'), g.convert_location('c9')))
+        self.assertEqual(result.get_score(), MATE_SCORE - 1)
+        self.assertEqual(result.get_pv(), [result.get_move()])
+        self.assertEqual(result.get_depth(), 1)
+        self.assertEqual(g.position_hash(), before)
+        self.assertEqual(len(g.get_move_history()), len(RED_WIN) - 1)
+        self.assertIs(g.play_move(result.get_move()), True)
+        self.assertEqual(g.get_game_state(), 'RED_WON')
+
+    def test_engine_respects_node_budget(self):
+        """ENGINE: test the search stops at its node budget and still returns a legal move"""
+        from JanggiEngine import best_move, SearchLimits
+        g = JanggiGame()
+        result = best_move(g, SearchLimits(nodes=200))
+        self.assertLessEqual(result.get_nodes(), 200)
+        self.assertIn(result.get_move(), g.legal_moves())
+        self.assertGreaterEqual(result.get_nps(), 0)
+        self.assertEqual(g.get_move_history(), [])
+
+    def test_transposition_table_sizing_and_replacement(self):
+        """ENGINE: test the transposition table fits its budget and keeps the deeper entry in the first slot"""
+        from JanggiEngine import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, MATE_SCORE
+        table = TranspositionTable(1)
+        self.assertEqual(table.get_slots(), 65536)
+        self.assertLessEqual(table.get_size_mb(), 1)
+        self.assertIsNone(table.probe(12345))
+        table.store(12345, 121654, 5, EXACT, -MATE_SCORE)
+        self.assertEqual(table.probe(12345), (121654, 5, EXACT, -MATE_SCORE))
+        collision = 12345 + (1 << 40)  # Same bucket, different position
+        table.store(collision, 7, 2, LOWER_BOUND, 300)
+        self.assertEqual(table.probe(12345), (121654, 5, EXACT, -MATE_SCORE))
+        self.assertEqual(table.probe(collision), (7, 2, LOWER_BOUND, 300))
+        table.store(collision + (1 << 41), 9, 1, UPPER_BOUND, -40)  # Replaces the always-replace slot
+        self.assertIsNone(table.probe(collision))
+        table.store(12345, 3, 6, EXACT, 10)
+        self.assertEqual(table.probe(12345), (3, 6, EXACT, 10))
+        self.assertEqual(table.get_occupancy(), 2 / 65536)
+        self.assertEqual(table.get_hit_rate(), 4 / 6)
+        table.clear()
+        self.assertIsNone(table.probe(12345))
+        self.assertEqual(table.get_occupancy(), 0)
+
+    def test_transposition_table_is_reused_between_searches(self):
+        """ENGINE: test a shared table makes a repeated search cheaper without changing its result"""
+        from JanggiEngine import best_move, SearchLimits, TranspositionTable
+        g = JanggiGame()
+        table = TranspositionTable(1)
+        first = best_move(g, SearchLimits(depth=3), table)
+        second = best_move(g, SearchLimits(depth=3), table)
+        self.assertEqual((second.get_move(), second.get_score()), (first.get_move(), first.get_score()))
+        self.assertLess(second.get_nodes(), first.get_nodes())
+        self.assertGreater(table.get_hit_rate(), 0)
+        self.assertGreater(table.get_occupancy(), 0)
+
+    def test_move_orderer_puts_captures_first_and_one_pass_last(self):
+        """ENGINE: test move ordering yields the hash move, captures by victim value, killers, quiets, then one pass"""
+        from JanggiEngine import MoveOrderer, PIECE_VALUES
+        from JanggiGame import move_src, move_dst, move_captured
+        g = JanggiGame()
+        for source, destination in RED_WIN[:21]:
+            g.make_move(source, destination)
+        moves = g.legal_moves()
+        passes = [move for move in moves if move_src(move) == move_dst(move)]
+        quiets = [move for move in moves if not move_captured(move) and move not in passes]
+        orderer = MoveOrderer()
+        orderer.record_cutoff(quiets[-1], 3, 2)
+        ordered = list(orderer.order(moves, quiets[3], 2))
+        self.assertEqual(len(ordered), len(moves) - len(passes) + 1)
+        self.assertEqual(set(ordered), set(moves) - set(passes[1:]))
+        self.assertEqual(ordered[0], quiets[3])
+        self.assertEqual(ordered[-1], passes[0])
+        captures = [move for move in ordered if move_captured(move)]
+        self.assertEqual(len(captures), 3)
+        self.assertEqual(ordered[1:len(captures) + 1], captures)
+        victims = [PIECE_VALUES[move_captured(move)] for move in captures]
+        self.assertEqual(victims, sorted(victims, reverse=True))
+        self.assertEqual(ordered[len(captures) + 1], quiets[-1])
+        self.assertEqual(orderer.get_killers(2), [quiets[-1], 0])
+        self.assertEqual(orderer.get_history(quiets[-1]), 9)
+        ordered = list(orderer.order(moves, passes[-1], 2))  # A pass hash move is the only pass searched
+        self.assertEqual(len(ordered), len(moves) - len(passes) + 1)
+        self.assertEqual(ordered[0], passes[-1])
+        self.assertEqual([move for move in ordered if move in passes], [passes[-1]])
+
+    def test_capture_moves_match_legal_captures(self):
+        """ENGINE: test the capture generator yields exactly the capturing legal moves through a whole game"""
+        from JanggiGame import move_captured
+        g = JanggiGame()
+        for source, destination in RED_WIN[:-1]:
+            g.make_move(source, destination)
+            captures = [move for move in g.legal_moves() if move_captured(move)]
+            self.assertEqual(sorted(g.get_capture_moves()), sorted(captures))
+
+    def test_quiescence_sees_the_recapture(self):
+        """ENGINE: test a one ply search does not grab a defended soldier with its chariot"""
+        from JanggiGame import Chariot, General, Soldier
+        from JanggiEngine import best_move, SearchLimits
+        g = JanggiGame()
+        for row in range(10):
+            for column in range(9):
+                g.set_janggi_board(row, column, [])
+        g.set_janggi_board(8, 4, General('BLUE'))
+        g.set_janggi_board(1, 4, General('RED'))
+        g.set_janggi_board(9, 0, Chariot('BLUE'))
+        g.set_janggi_board(3, 0, Soldier('RED'))
+        g.set_janggi_board(0, 0, Chariot('RED'))
+        result = best_move(g, SearchLimits(depth=1))
+        self.assertNotEqual(result.get_move(), g.get_move_code((9, 0), (3, 0)))
+        self.assertLess(result.get_score(), 0)  # Down a soldier, not a chariot
+
+    def test_incremental_evaluation_matches_a_full_scan(self):
+        """ENGINE: test the incremental evaluation agrees with a board scan through make and unmake"""
+        g = JanggiGame()
+        self.assertEqual(g.evaluate(), 0)
+        for source, destination in RED_WIN:
+            g.make_move(source, destination)
+            self.assertEqual(g.evaluate(), g.compute_evaluation())
+        self.assertLess(g.evaluate(), -1000)  # Blue to move is mated and a chariot down
+        while g.unmake_move():
+            self.assertEqual(g.evaluate(), g.compute_evaluation())
+        self.assertEqual(g.evaluate(), 0)
+
+    def test_parallel_search_matches_serial_search(self):
+        """ENGINE: test splitting the root over worker processes finds the serial search's move and score"""
+        from JanggiEngine import best_move, ParallelSearcher, SearchLimits, benchmark_positions, BENCHMARK_FENS
+        game = benchmark_positions()[1]
+        serial = best_move(game, SearchLimits(depth=2))
+        with ParallelSearcher(2) as searcher:
+            parallel = searcher.search(game, SearchLimits(depth=2))
+            self.assertEqual((parallel.get_move(), parallel.get_score()), (serial.get_move(), serial.get_score()))
+            self.assertEqual(parallel.get_depth(), 2)
+            g = JanggiGame()
+            for source, destination in RED_WIN[:-1]:
+                g.make_move(source, destination)
+            self.assertEqual(searcher.search(g, SearchLimits(depth=3)).get_pv(),
+                             [g.get_move_code(g.convert_location('c1'), g.convert_location('c9'))])
+        self.assertEqual(game.to_fen(), BENCHMARK_FENS[1])
+
+    def test_parallel_node_budget_covers_all_workers(self):
+        """ENGINE: test a node budget split over worker processes stops at the budget in total and searches at least
+        as deep as the serial search"""
+        from JanggiEngine import best_move, ParallelSearcher, SearchLimits, benchmark_positions
+        game = benchmark_positions()[2]
+        serial = best_move(game, SearchLimits(nodes=3000))
+        with ParallelSearcher(2) as searcher:
+            parallel = searcher.search(game, SearchLimits(nodes=3000))
+        self.assertLessEqual(parallel.get_nodes(), 3000)
+        self.assertGreaterEqual(parallel.get_depth(), serial.get_depth())
+        self.assertIn(parallel.get_move(), game.legal_moves())
+
+
+class TestPerft(unittest.TestCase):
+    def test_perft_from_the_start_position(self):
+        """PERFT: test the move path counts from the start position, passes included"""
+        g = JanggiGame()
+        self.assertEqual([g.perft(depth) for depth in range(3)], [1, 47, 2209])
+        self.assertEqual(g.get_move_history(), [])
+        self.assertEqual(g.position_hash(), g.compute_position_hash())
+
+    def test_divide_splits_perft_by_root_move(self):
+        """PERFT: test divide counts every legal root move and adds up to perft"""
+        from JanggiGame import move_name
+        g = JanggiGame()
+        g.make_move('c7', 'c6')
+        counts = g.divide(2)
+        self.assertEqual(sorted(counts), sorted(g.legal_moves()))
+        self.assertEqual(sum(counts.values()), g.perft(2))
+        self.assertEqual({move_name(move): count for move, count in counts.items()}['c1d3'], 47)
+
+    def test_hashed_and_parallel_perft_match_perft(self):
+        """PERFT: test caching subtree counts and splitting the root over processes do not change the counts"""
+        from perft import divide, PerftTable
+        g = JanggiGame()
+        table = PerftTable(1)
+        self.assertEqual(table.get_slots(), 1 << 16)
+        self.assertEqual(g.hashed_perft(3, table), 105658)
+        self.assertEqual(table.probe(g.position_hash() ^ 3, 3), 105658)
+        self.assertEqual(g.hashed_perft(3, table), 105658)
+        self.assertEqual(g.hashed_perft(3, PerftTable(0.001)), 105658)  # 32 slots, replaced over and over
+        g.make_move('c7', 'c6')
+        self.assertEqual(divide(g, 2, hashed=True, table_mb=1), g.divide(2))
+        self.assertEqual(divide(g, 2, hashed=True, workers=2, table_mb=1), g.divide(2))
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_benchmark_covers_the_corpus_and_flags_regressions(self):
+        """BENCHMARK: test every operation is timed on every corpus position and slowdowns are reported"""
+        from benchmark import CORPUS, run, compare
+        results = run(1)
+        self.assertEqual(len(results), 4 * len(CORPUS) + 1)
+        self.assertEqual({name.split('/')[1] for name in results}, {'opening', 'middlegame', 'endgame', 'full-game'})
+        for result in results.values():
+            self.assertGreater(result['ops_per_sec'], 0)
+            self.assertLessEqual(result['p50_us'], result['p99_us'])
+        baseline = {name: dict(result, ops_per_sec=result['ops_per_sec'] * 2) for name, result in results.items()}
+        self.assertEqual(compare(results, results, 0.1), [])
+        self.assertEqual(len(compare(results, baseline, 0.1)), len(results))
+
+    def test_check_timing_generates_the_replies(self):
+        """BENCHMARK: test the check_in_check operation finds the check on the side to move, generates their moves on
+        every call and leaves the position as it was"""
+        from benchmark import CORPUS, position_operations
+        game = JanggiGame.from_fen(dict((name, fen) for category, name, fen in CORPUS)['mating-attack'])
+        operation = dict(position_operations(game))['check_in_check']
+        fen, legal = game.to_fen(), sorted(game.legal_moves())
+        generate = JanggiGame.get_all_valid_moves
+        generated = []
+        JanggiGame.get_all_valid_moves = lambda self: generated.append(self.get_player_turn()) or generate(self)
+        try:
+            for call in range(3):
+                operation()
+        finally:
+            JanggiGame.get_all_valid_moves = generate
+        self.assertEqual(generated, ['RED'] * 3)
+        self.assertEqual((game.to_fen(), sorted(game.legal_moves())), (fen, legal))
+        self.assertIs(game.is_in_check('red'), True)
+
+
+class TestSelfPlay(unittest.TestCase):
+    def test_selfplay_is_reproducible_across_workers(self):
+        """SELFPLAY: test games played in worker processes match the same seeds played in process"""
+        from selfplay import selfplay, greedy_capture_policy, random_policy
+        serial = list(selfplay(4, greedy_capture_policy, random_policy, workers=1, max_plies=40, seed=7))
+        parallel = sorted(selfplay(4, greedy_capture_policy, random_policy, workers=2, max_plies=40, seed=7),
+                          key=lambda record: record['game'])
+        self.assertEqual(parallel, serial)
+        for record in serial:
+            self.assertLessEqual(record['plies'], 40)
+            g = JanggiGame()
+            for move in record['moves']:
+                split = 3 if move[2].isdigit() else 2
+                self.assertIs(g.make_move(move[:split], move[split:]), True)
+            self.assertEqual(g.get_game_state(), record['result'])
+
+    def test_greedy_policy_takes_the_most_valuable_piece(self):
+        """SELFPLAY: test the greedy policy prefers capturing an elephant to capturing a soldier"""
+        import random
+        from selfplay import greedy_capture_policy
+        from JanggiGame import move_dst
+        g = JanggiGame()
+        for source, destination in RED_WIN[:21]:
+            g.make_move(source, destination)
+        move = greedy_capture_policy(g, g.legal_moves(), random.Random(0))
+        self.assertEqual(g.get_tile_occupant(divmod(move_dst(move), 9)).get_name(), 'EL')
+
+
+class TestFen(unittest.TestCase):
+    def test_start_position_fen(self):
+        """FEN: test the start position writes and reads back as the standard Janggi FEN"""
+        from JanggiGame import START_FEN
+        g = JanggiGame()
+        self.assertEqual(g.to_fen(), START_FEN)
+        loaded = JanggiGame.from_fen(START_FEN)
+        self.assertEqual(loaded.get_janggi_board(), g.get_janggi_board())
+        self.assertEqual(loaded.position_hash(), g.position_hash())
+        self.assertEqual(loaded.evaluate(), g.evaluate())
+        g.make_move('c7', 'c6')
+        g.make_move('c1', 'd3')
+        self.assertEqual(g.to_fen(), 'rb1a1abnr/4k4/1c1n3c1/p1p1p1p1p/9/2P6/P3P1P1P/1C5C1/4K4/RBNA1ABNR w - - 2 2')
+
+    def test_fen_loads_check_and_checkmate(self):
+        """FEN: test loading a position works out the check flags and game state"""
+        g = JanggiGame()
+        for source, destination in RED_WIN[:-1]:
+            g.make_move(source, destination)
+        loaded = JanggiGame.from_fen(g.to_fen())
+        self.assertEqual(sorted(loaded.legal_moves()), sorted(g.legal_moves()))
+        self.assertIs(loaded.make_move('c1', 'c9'), True)
+        self.assertEqual(loaded.get_game_state(), 'RED_WON')
+        mated = JanggiGame.from_fen(loaded.to_fen())
+        self.assertEqual(mated.get_game_state(), 'RED_WON')
+        self.assertIs(mated.is_in_check('blue'), True)
+        self.assertEqual(mated.position_hash(), loaded.position_hash())
+        self.assertEqual(mated.to_fen(), loaded.to_fen())
+
+    def test_fen_loads_without_placing_the_start_position(self):
+        """FEN: test from_fen builds its game without setting up and throwing away the start position"""
+        from JanggiGame import START_FEN
+        place_pieces = JanggiGame.place_pieces
+        JanggiGame.place_pieces = None  # Any call fails
+        try:
+            loaded = JanggiGame.from_fen(START_FEN)
+        finally:
+            JanggiGame.place_pieces = place_pieces
+        g = JanggiGame()
+        self.assertEqual(loaded.get_janggi_board(), g.get_janggi_board())
+        self.assertEqual((loaded.position_hash(), loaded.evaluate()), (g.position_hash(), g.evaluate()))
+        self.assertEqual(sorted(loaded.legal_moves()), sorted(g.legal_moves()))
+        self.assertIs(loaded.make_move('c7', 'c6'), True)
+
+    def test_malformed_fen_is_rejected(self):
+        """FEN: test a FEN with the wrong number of ranks, squares or an unknown side raises ValueError"""
+        for fen in ['', '9/9 w', 'rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABN w - - 0 1',
+                    'rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR x - - 0 1',
+                    'rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNQ w - - 0 1']:
+            self.assertRaises(ValueError, JanggiGame.from_fen, fen)
+
+
+class TestEncoding(unittest.TestCase):
+    def test_encode_round_trips_the_position(self):
+        """ENCODE: test the 46 byte encoding restores board, turn, check flags and game state"""
+        from JanggiGame import ENCODED_SIZE
+        g = JanggiGame()
+        seen = {}
+        for source, destination in RED_WIN:
+            g.make_move(source, destination)
+            data = g.encode()
+            self.assertEqual(len(data), ENCODED_SIZE)
+            seen[data] = g.to_fen()
+            decoded = JanggiGame.decode(data)
+            self.assertEqual(decoded.get_janggi_board(), g.get_janggi_board())
+            self.assertEqual(decoded.get_player_turn(), g.get_player_turn())
+            self.assertEqual((decoded.is_in_check('blue'), decoded.is_in_check('red')),
+                             (g.is_in_check('blue'), g.is_in_check('red')))
+            self.assertEqual(decoded.get_game_state(), g.get_game_state())
+            self.assertEqual(decoded.position_hash(), g.position_hash())
+            self.assertEqual(decoded.evaluate(), g.evaluate())
+            self.assertEqual(decoded.encode(), data)
+        self.assertEqual(len(seen), len(RED_WIN))
+        self.assertEqual(JanggiGame.decode(g.encode()).get_game_state(), 'RED_WON')
+        self.assertEqual(JanggiGame().encode()[:5], bytes([0xDB, 0xCA, 0x0A, 0xBC, 0xD0]))  # RED's back rank
+
+    def test_decode_does_not_place_the_start_position(self):
+        """ENCODE: test decode builds its game without setting up and throwing away the start position"""
+        g = JanggiGame()
+        g.make_move('c7', 'c6')
+        data = g.encode()
+        place_pieces = JanggiGame.place_pieces
+        JanggiGame.place_pieces = None  # Any call fails
+        try:
+            decoded = JanggiGame.decode(data)
+        finally:
+            JanggiGame.place_pieces = place_pieces
+        self.assertEqual(decoded.get_janggi_board(), g.get_janggi_board())
+        self.assertEqual((decoded.position_hash(), decoded.evaluate()), (g.position_hash(), g.evaluate()))
+        self.assertIs(decoded.make_move('c1', 'd3'), True)
+
+    def test_decode_rejects_bad_data(self):
+        """ENCODE: test decode refuses data of the wrong size, unknown pieces and unknown game states"""
+        data = JanggiGame().encode()
+        for bad in [data[:-1], bytes([0x80]) + data[1:], data[:-1] + bytes([3 << 3])]:
+            self.assertRaises(ValueError, JanggiGame.decode, bad)
+
+
+class TestRecords(unittest.TestCase):
+    """Tests for the streaming game record reader and writer"""
+
+    def red_win_record(self):
+        """ Returns the record of the RED_WIN game with a pass by each side after the fourth move """
+        from JanggiRecords import record_from_game
+        g = JanggiGame()
+        for index, (source, destination) in enumerate(RED_WIN):
+            if index == 4:
+                self.assertTrue(g.make_move('e9', 'e9'))
+                self.assertTrue(g.make_move('e2', 'e2'))
+            self.assertTrue(g.make_move(source, destination))
+        return record_from_game(g, {'Event': 'test'})
+
+    def test_gib_coordinates(self):
+        """RECORDS: test GIB rank-file coordinates map to locations, with rank 0 meaning 10"""
+        from JanggiRecords import GIB_LOCATIONS, LOCATION_GIB, parse_move
+        self.assertEqual(GIB_LOCATIONS['79'], 'i7')
+        self.assertEqual(GIB_LOCATIONS['03'], 'c10')
+        self.assertEqual(LOCATION_GIB['a1'], '11')
+        self.assertEqual(parse_move('79졸78'), ('i7', 'h7'))
+        self.assertEqual(parse_move('b10d8'), ('b10', 'd8'))
+        self.assertIsNone(parse_move('한수쉼'))
+        self.assertIsNone(parse_move('e9e9'))
+        self.assertFalse(parse_move('z1z2'))
+
+    def test_round_trip(self):
+        """RECORDS: test games written in either notation read back to the same moves and replay to the result"""
+        import io
+        from JanggiRecords import read_games, write_games
+        record = self.red_win_record()
+        self.assertEqual(record.get_result(), 'RED_WON')
+        for notation in ['text', 'gib']:
+            stream = io.StringIO()
+            self.assertEqual(write_games(stream, [record, record], notation), 2)
+            stream.seek(0)
+            records = list(read_games(stream))
+            self.assertEqual(len(records), 2)
+            for read in records:
+                self.assertEqual(read.get_moves(), record.get_moves())
+                self.assertEqual(read.get_tags()['Event'], 'test')
+                self.assertEqual(read.get_result(), 'RED_WON')
+                self.assertEqual(read.replay().get_game_state(), 'RED_WON')
+
+    def test_read_is_lazy(self):
+        """RECORDS: test games are yielded as soon as they end, before later lines are read"""
+        from JanggiRecords import read_games
+
+        def lines():
+            yield '[대국결과 "한 완승"]'
+            yield '1. 73졸63 2. 13마34'
+            yield ''
+            raise AssertionError('read past the first game')
+        record = next(read_games(lines()))
+        self.assertEqual(record.get_moves(), [('c7', 'c6'), ('c1', 'd3')])
+        self.assertEqual(record.get_result(), 'RED_WON')
+
+    def test_bad_records(self):
+        """RECORDS: test unreadable tokens, invalid moves and other setups raise ValueError"""
+        from JanggiRecords import GameRecord, read_games
+        self.assertRaises(ValueError, list, read_games(['1. c7c6 junk']))
+        self.assertRaises(ValueError, next(read_games(['1. c7c5'])).replay)
+        self.assertRaises(ValueError, GameRecord({'초차림': '마상마상'}).replay)
+
+
+class TestArchive(unittest.TestCase):
+    """Tests for the memory-mapped game archive"""
+
+    def test_write_and_read(self):
+        """ARCHIVE: test every game reads back by number with its moves, passes and result, and replays"""
+        import os
+        import tempfile
+        from JanggiArchive import write_archive, GameArchive
+        from JanggiRecords import GameRecord
+        won = [tuple(move) for move in RED_WIN]
+        records = [GameRecord({'Result': 'RED_WON'}, won),
+                   GameRecord({}, [('c7', 'c6'), None, ('e7', 'e6')]),
+                   GameRecord({}, []),
+                   GameRecord({'Result': 'UNFINISHED'}, won[:10])]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.jga')
+            self.assertEqual(write_archive(path, iter(records)), 4)
+            with GameArchive(path) as archive:
+                self.assertEqual(len(archive), 4)
+                for number in [3, 0, 2, 1]:
+                    self.assertEqual(archive.get_moves(number), records[number].get_moves())
+                    self.assertEqual(archive.get_result(number), records[number].get_result())
+                self.assertEqual(archive.replay(0).get_game_state(), 'RED_WON')
+                self.assertEqual(archive.replay(1).get_player_turn(), 'RED')
+                self.assertRaises(IndexError, archive.get_moves, 4)
+            self.assertRaises(ValueError, write_archive, path, [GameRecord({'FEN': '9/9 w'}, [])])
+            self.assertRaises(ValueError, GameArchive, path)  # The unfinished archive is not readable
+            self.assertRaises(ValueError, write_archive, path, [GameRecord({'초차림': '마상마상'}, [('c7', 'c6')])])
+            self.assertRaises(ValueError, GameArchive, path)
+            self.assertEqual(write_archive(path, [GameRecord({'초차림': '상마상마', '한차림': '상마 상마'}, [])]), 1)
+            self.assertRaises(ValueError, write_archive, path, records + [GameRecord({'FEN': '9/9 w'}, [])])
+            self.assertRaises(ValueError, GameArchive, path)
+            with open(path, 'wb') as bad:
+                bad.write(b'not an archive at all, not even close')
+            self.assertRaises(ValueError, GameArchive, path)